@@ -7,6 +7,9 @@
 import cv2
 import numpy as np
 
+# 缓存已绘制好的logo底图（圆环+实心圆），生成多个logo变体时只需重新绘制文字
+_BASE_LOGO = None
+
 
 def create_simple_watermark(text="COPYRIGHT", width=100, height=50, output_path="watermark.png"):
     """
@@ -41,14 +44,23 @@ def create_simple_watermark(text="COPYRIGHT", width=100, height=50, output_path=
     print(f"尺寸: {width} x {height}")
 
 
-def create_logo_watermark(output_path="logo_watermark.png"):
-    """创建一个简单的logo式水印"""
-    watermark = np.zeros((64, 64), dtype=np.uint8)
+def _get_base_logo():
+    """返回logo底图的副本，底图只在首次调用时绘制"""
+    global _BASE_LOGO
+    if _BASE_LOGO is None:
+        base = np.zeros((64, 64), dtype=np.uint8)
+
+        # 画一个简单的图案
+        cv2.circle(base, (32, 32), 25, 255, 2)
+        cv2.circle(base, (32, 32), 15, 255, -1)
+        _BASE_LOGO = base
+    return _BASE_LOGO.copy()
 
-    # 画一个简单的图案
-    cv2.circle(watermark, (32, 32), 25, 255, 2)
-    cv2.circle(watermark, (32, 32), 15, 255, -1)
-    cv2.putText(watermark, "WM", (22, 37), cv2.FONT_HERSHEY_SIMPLEX, 0.7, 0, 2)
+
+def create_logo_watermark(output_path="logo_watermark.png", text="WM"):
+    """创建一个简单的logo式水印"""
+    watermark = _get_base_logo()
+    cv2.putText(watermark, text, (22, 37), cv2.FONT_HERSHEY_SIMPLEX, 0.7, 0, 2)
 
     cv2.imwrite(output_path, watermark)
     print(f"Logo水印已创建: {output_path}")
@@ -21,6 +21,8 @@ from typing import Tuple, Optional, Union
 from dataclasses import dataclass
 from enum import Enum
 import json
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 
 # Configure logging
@@ -28,12 +30,51 @@ logging.basicConfig(
     level=logging.INFO,
     format='%(asctime)s - %(levelname)s - %(message)s',
     handlers=[
-        logging.FileHandler('watermark_system.log'),
+        logging.FileHandler('watermark_system.log', delay=True),
         logging.StreamHandler()
     ]
 )
 logger = logging.getLogger(__name__)
 
+# 可选依赖：Numba 并行内核（未安装时回退到纯 NumPy 实现）
+try:
+    from numba import njit, prange
+    NUMBA_AVAILABLE = True
+except ImportError:
+    NUMBA_AVAILABLE = False
+
+# 可选依赖：Pillow 仅读取文件头即可获得图像尺寸（未安装时回退到 OpenCV 完整解码）
+try:
+    from PIL import Image
+    PIL_AVAILABLE = True
+except ImportError:
+    PIL_AVAILABLE = False
+
+# 宿主图像字节数超过该阈值（约 4K RGB）时使用 Numba 内核
+NUMBA_SIZE_THRESHOLD = 3840 * 2160 * 3
+
+# 嵌入时每次解包的打包水印字节数（64KB）
+PACKED_CHUNK_BYTES = 64 * 1024
+
+if NUMBA_AVAILABLE:
+    @njit(parallel=True, fastmath=False, cache=True)
+    def _embed_kernel(host_flat, packed_bits, n):
+        """原地替换前 n 个字节的最低有效位（比特按 MSB 优先打包）"""
+        for i in prange(n):
+            bit = (packed_bits[i >> 3] >> (7 - (i & 7))) & 1
+            host_flat[i] = (host_flat[i] & 0xFE) | bit
+
+    @njit(parallel=True, fastmath=False, cache=True)
+    def _extract_kernel(host_flat, n):
+        """提取前 n 个字节的最低有效位并按 MSB 优先打包"""
+        packed = np.zeros((n + 7) // 8, dtype=np.uint8)
+        for j in prange(packed.size):
+            byte = 0
+            for k in range(min(8, n - j * 8)):
+                byte |= (host_flat[j * 8 + k] & 1) << (7 - k)
+            packed[j] = byte
+        return packed
+
 
 class ProcessingMode(Enum):
     """定义图像处理模式枚举"""
@@ -57,11 +98,24 @@ class ImageMetadata:
         if not os.path.exists(image_path):
             raise FileNotFoundError(f"图像文件不存在: {image_path}")
 
-        img = cv2.imread(image_path)
-        if img is None:
-            raise ValueError(f"无法读取图像文件: {image_path}")
+        h = w = c = None
+        if PIL_AVAILABLE:
+            # Image.open 是惰性的，只解析文件头，不解码像素
+            try:
+                with Image.open(image_path) as img:
+                    w, h = img.size
+                    c = len(img.getbands())
+            except (OSError, ValueError):
+                logger.debug("Pillow 无法解析文件头，回退到完整解码: %s", image_path)
+
+        if h is None:
+            img = cv2.imread(image_path, cv2.IMREAD_UNCHANGED)
+            if img is None:
+                raise ValueError(f"无法读取图像文件: {image_path}")
+
+            h, w = img.shape[:2]
+            c = img.shape[2] if img.ndim == 3 else 1
 
-        h, w, c = img.shape
         file_size = os.path.getsize(image_path)
 
         return cls(h, w, c, image_path, file_size)
@@ -78,6 +132,25 @@ class WatermarkConfig:
     output_scale: int = 255
 
 
+@dataclass
+class PackedBits:
+    """按位打包的比特序列（每字节 8 个比特，MSB 优先）"""
+    data: np.ndarray
+    length: int
+
+    @classmethod
+    def from_bits(cls, bits: np.ndarray) -> 'PackedBits':
+        """从 {0, 1} 比特数组创建打包序列"""
+        return cls(np.packbits(bits.ravel()), bits.size)
+
+    def unpack(self) -> np.ndarray:
+        """解包为 uint8 比特数组"""
+        return np.unpackbits(self.data, count=self.length)
+
+    def __len__(self) -> int:
+        return self.length
+
+
 class ImageProcessor:
     """图像处理器基类"""
 
@@ -91,7 +164,7 @@ class ImageProcessor:
             image_data = cv2.imread(path, mode)
             if image_data is None:
                 raise IOError(f"图像加载失败: {path}")
-            logger.debug(f"成功加载图像: {path}, 尺寸: {image_data.shape}")
+            logger.debug("成功加载图像: %s, 尺寸: %s", path, image_data.shape)
             return image_data
         except Exception as e:
             logger.error(f"图像加载错误: {e}")
@@ -151,55 +224,51 @@ class LSBWatermarkEmbedder(ImageProcessor):
         logger.info(f"容量验证通过: {watermark_bits}/{host_pixels} 位")
         return True
 
-    def preprocess_watermark(self, watermark_image: np.ndarray) -> np.ndarray:
+    def preprocess_watermark(self, watermark_image: np.ndarray) -> PackedBits:
         """预处理水印图像"""
-        binary_watermark = self.convert_to_binary(watermark_image)
-        flattened_bits = binary_watermark.flatten()
+        # 阈值比较与 cv2.THRESH_BINARY 语义一致（大于阈值为 1），结果直接打包，无需中间二值图
+        binary_watermark = np.greater(watermark_image, self.config.threshold_value)
+        packed_bits = PackedBits.from_bits(binary_watermark)
 
-        logger.info(f"水印预处理完成: {len(flattened_bits)} 个比特")
-        self.embedding_statistics['watermark_bits'] = len(flattened_bits)
+        logger.info(f"水印预处理完成: {len(packed_bits)} 个比特")
+        self.embedding_statistics['watermark_bits'] = len(packed_bits)
 
-        return flattened_bits
+        return packed_bits
 
     def perform_lsb_embedding(self, host_image: np.ndarray,
-                              watermark_bits: np.ndarray) -> np.ndarray:
-        """执行LSB嵌入操作"""
-        modified_image = host_image.copy()
-        height, width, channels = host_image.shape
-        bit_counter = 0
-        watermark_length = len(watermark_bits)
-
-        # 嵌入循环
-        for row_idx in range(height):
-            for col_idx in range(width):
-                for channel_idx in range(channels):
-                    if bit_counter < watermark_length:
-                        current_pixel = modified_image[row_idx, col_idx, channel_idx]
-                        watermark_bit = watermark_bits[bit_counter]
-
-                        # LSB替换操作
-                        modified_pixel = self._replace_lsb(current_pixel, watermark_bit)
-                        modified_image[row_idx, col_idx, channel_idx] = modified_pixel
-
-                        bit_counter += 1
-                    else:
-                        break
-                if bit_counter >= watermark_length:
-                    break
-            if bit_counter >= watermark_length:
-                break
+                              watermark_bits: PackedBits,
+                              inplace: bool = False) -> np.ndarray:
+        """执行LSB嵌入操作（inplace 为 True 时直接修改传入的宿主图像，省去整幅图像的复制）"""
+        if inplace:
+            if not host_image.flags.c_contiguous:
+                raise ValueError("原地嵌入要求宿主图像为C连续数组")
+            modified_image = host_image
+        else:
+            modified_image = host_image.copy()
+
+        # 按 (行, 列, 通道) 顺序展平，与逐像素遍历的嵌入顺序一致
+        flat_pixels = modified_image.reshape(-1)
+        bit_counter = len(watermark_bits)
+        packed_data = watermark_bits.data
+
+        # LSB替换操作：清除最低位并设置新的比特值
+        if NUMBA_AVAILABLE and host_image.size > NUMBA_SIZE_THRESHOLD:
+            _embed_kernel(flat_pixels, packed_data, bit_counter)
+        else:
+            # 分块解包，避免一次性展开完整的比特数组
+            for chunk_start in range(0, packed_data.size, PACKED_CHUNK_BYTES):
+                bit_start = chunk_start * 8
+                chunk_bits = np.unpackbits(packed_data[chunk_start:chunk_start + PACKED_CHUNK_BYTES],
+                                           count=min(PACKED_CHUNK_BYTES * 8, bit_counter - bit_start))
+                segment = flat_pixels[bit_start:bit_start + chunk_bits.size]
+                np.bitwise_and(segment, np.uint8(0b11111110), out=segment)
+                np.bitwise_or(segment, chunk_bits, out=segment)
 
         self.embedding_statistics['embedded_bits'] = bit_counter
         logger.info(f"LSB嵌入完成: {bit_counter} 个比特已嵌入")
 
         return modified_image
 
-    def _replace_lsb(self, pixel_value: int, bit_value: int) -> int:
-        """替换像素的最低有效位"""
-        # 清除最低位并设置新的比特值
-        modified_pixel = (pixel_value & 0b11111110) | bit_value
-        return modified_pixel
-
     def embed_watermark_in_image(self, host_path: str, watermark_path: str,
                                  output_path: str) -> bool:
         """主要的水印嵌入接口"""
@@ -218,7 +287,8 @@ class LSBWatermarkEmbedder(ImageProcessor):
             watermark_bits = self.preprocess_watermark(watermark_image)
 
             # 执行嵌入
-            watermarked_image = self.perform_lsb_embedding(host_image, watermark_bits)
+            # 宿主图像刚从磁盘加载，可直接在其缓冲区上嵌入
+            watermarked_image = self.perform_lsb_embedding(host_image, watermark_bits, inplace=True)
 
             # 保存结果
             success = self.save_image(watermarked_image, output_path)
@@ -245,11 +315,12 @@ class LSBWatermarkEmbedder(ImageProcessor):
             }
         }
 
-        metadata_path = output_path.replace('.png', '_metadata.json').replace('.jpg', '_metadata.json')
+        output_file = Path(output_path)
+        metadata_path = str(output_file.with_name(output_file.stem + '_metadata.json'))
         try:
             with open(metadata_path, 'w', encoding='utf-8') as f:
                 json.dump(metadata, f, indent=2, ensure_ascii=False)
-            logger.debug(f"元数据已保存: {metadata_path}")
+            logger.debug("元数据已保存: %s", metadata_path)
         except Exception as e:
             logger.warning(f"保存元数据失败: {e}")
 
@@ -262,35 +333,23 @@ class LSBWatermarkExtractor(ImageProcessor):
         self.extraction_statistics = {}
 
     def extract_lsb_bits(self, watermarked_image: np.ndarray,
-                         total_bits_needed: int) -> np.ndarray:
+                         total_bits_needed: int) -> PackedBits:
         """从图像中提取LSB比特"""
-        height, width, channels = watermarked_image.shape
-        extracted_bits = []
-
-        for row_idx in range(height):
-            for col_idx in range(width):
-                for channel_idx in range(channels):
-                    if len(extracted_bits) < total_bits_needed:
-                        pixel_value = watermarked_image[row_idx, col_idx, channel_idx]
-                        lsb_bit = self._extract_lsb(pixel_value)
-                        extracted_bits.append(lsb_bit)
-                    else:
-                        break
-                if len(extracted_bits) >= total_bits_needed:
-                    break
-            if len(extracted_bits) >= total_bits_needed:
-                break
+        # 按 (行, 列, 通道) 顺序展平，与嵌入顺序一致
+        flat_pixels = np.ascontiguousarray(watermarked_image).reshape(-1)
+        bit_count = min(total_bits_needed, flat_pixels.size)
+        if NUMBA_AVAILABLE and watermarked_image.size > NUMBA_SIZE_THRESHOLD:
+            packed_data = _extract_kernel(flat_pixels, bit_count)
+        else:
+            packed_data = np.packbits(flat_pixels[:bit_count] & np.uint8(1))
+        extracted_bits = PackedBits(packed_data, bit_count)
 
         logger.info(f"LSB比特提取完成: {len(extracted_bits)} 个比特")
         self.extraction_statistics['extracted_bits'] = len(extracted_bits)
 
-        return np.array(extracted_bits)
-
-    def _extract_lsb(self, pixel_value: int) -> int:
-        """提取像素的最低有效位"""
-        return pixel_value & 1
+        return extracted_bits
 
-    def reconstruct_watermark(self, bit_array: np.ndarray,
+    def reconstruct_watermark(self, bit_array: PackedBits,
                               target_dimensions: Tuple[int, int]) -> np.ndarray:
         """重构水印图像"""
         height, width = target_dimensions
@@ -299,15 +358,27 @@ class LSBWatermarkExtractor(ImageProcessor):
         if len(bit_array) < required_bits:
             raise ValueError(f"比特数量不足: 需要 {required_bits}，但只有 {len(bit_array)}")
 
-        # 重塑为二维数组
-        watermark_matrix = bit_array[:required_bits].reshape((height, width))
+        # 解包并重塑为二维数组
+        watermark_matrix = np.unpackbits(bit_array.data, count=required_bits).reshape((height, width))
 
         # 转换为显示格式
-        display_watermark = (watermark_matrix * self.config.output_scale).astype(np.uint8)
+        display_watermark = np.multiply(watermark_matrix, self.config.output_scale, dtype=np.uint8)
 
         logger.info(f"水印重构完成: {target_dimensions}")
         return display_watermark
 
+    def extract_from_array(self, watermarked_image: np.ndarray,
+                           watermark_dimensions: Tuple[int, int]) -> np.ndarray:
+        """从已解码的图像数组中提取并重构水印"""
+        # 计算需要提取的比特数
+        total_bits = watermark_dimensions[0] * watermark_dimensions[1]
+
+        # 提取LSB比特
+        extracted_bits = self.extract_lsb_bits(watermarked_image, total_bits)
+
+        # 重构水印
+        return self.reconstruct_watermark(extracted_bits, watermark_dimensions)
+
     def extract_watermark_from_image(self, watermarked_path: str,
                                      watermark_dimensions: Tuple[int, int],
                                      output_path: str) -> bool:
@@ -318,14 +389,8 @@ class LSBWatermarkExtractor(ImageProcessor):
             # 加载带水印的图像
             watermarked_image = self.load_image(watermarked_path, cv2.IMREAD_COLOR)
 
-            # 计算需要提取的比特数
-            total_bits = watermark_dimensions[0] * watermark_dimensions[1]
-
-            # 提取LSB比特
-            extracted_bits = self.extract_lsb_bits(watermarked_image, total_bits)
-
-            # 重构水印
-            reconstructed_watermark = self.reconstruct_watermark(extracted_bits, watermark_dimensions)
+            # 提取并重构水印
+            reconstructed_watermark = self.extract_from_array(watermarked_image, watermark_dimensions)
 
             # 保存提取的水印
             success = self.save_image(reconstructed_watermark, output_path)
@@ -348,28 +413,45 @@ class SimilarityAnalyzer:
 
     def compute_pixel_accuracy(self, original_path: str, extracted_path: str) -> float:
         """计算两个水印图像的像素准确率"""
-        try:
-            original_img = cv2.imread(original_path, cv2.IMREAD_GRAYSCALE)
-            extracted_img = cv2.imread(extracted_path, cv2.IMREAD_GRAYSCALE)
+        original_img = cv2.imread(original_path, cv2.IMREAD_GRAYSCALE)
+        extracted_img = cv2.imread(extracted_path, cv2.IMREAD_GRAYSCALE)
 
-            if original_img is None or extracted_img is None:
-                logger.error("无法加载比较图像")
-                return 0.0
+        if original_img is None or extracted_img is None:
+            logger.error("无法加载比较图像")
+            return 0.0
 
+        return self.compare_arrays(original_img, extracted_img)
+
+    def binarize(self, img: np.ndarray) -> np.ndarray:
+        """将灰度图像二值化为 {0, 255}"""
+        _, binary_img = cv2.threshold(img, self.threshold, 255, cv2.THRESH_BINARY)
+        return binary_img
+
+    def compare_arrays(self, original_img: np.ndarray, extracted_img: np.ndarray,
+                       already_binary: bool = False) -> float:
+        """计算两个水印数组的像素准确率（两者均已为 {0, 255} 二值数据时可跳过阈值处理）"""
+        try:
             if original_img.shape != extracted_img.shape:
                 logger.error(f"图像尺寸不匹配: {original_img.shape} vs {extracted_img.shape}")
                 return 0.0
 
             # 二值化处理
-            _, original_binary = cv2.threshold(original_img, self.threshold, 255, cv2.THRESH_BINARY)
-            _, extracted_binary = cv2.threshold(extracted_img, self.threshold, 255, cv2.THRESH_BINARY)
+            if already_binary:
+                original_binary, extracted_binary = original_img, extracted_img
+            else:
+                original_binary = self.binarize(original_img)
+                extracted_binary = self.binarize(extracted_img)
 
-            # 计算匹配度
-            matching_pixels = np.sum(original_binary == extracted_binary)
+            # 计算匹配度：单通道同类型数组走 OpenCV 的 SIMD 比较与计数，不生成 Python 侧布尔数组
+            if original_binary.ndim == 2 and original_binary.dtype == extracted_binary.dtype:
+                equal_mask = cv2.compare(original_binary, extracted_binary, cv2.CMP_EQ)
+                matching_pixels = cv2.countNonZero(equal_mask)
+            else:
+                matching_pixels = np.count_nonzero(original_binary == extracted_binary)
             total_pixels = original_img.size
 
-            accuracy = (matching_pixels / total_pixels) * 100
-            logger.debug(f"相似度分析: {matching_pixels}/{total_pixels} = {accuracy:.2f}%")
+            accuracy = 100.0 * matching_pixels / total_pixels
+            logger.debug("相似度分析: %d/%d = %.2f%%", matching_pixels, total_pixels, accuracy)
 
             return accuracy
 
@@ -387,6 +469,8 @@ class RobustnessTestSuite:
         self.extractor = LSBWatermarkExtractor()
         self.analyzer = SimilarityAnalyzer()
         self.test_results = {}
+        self.average_accuracy = 0.0
+        self._thread_state = threading.local()
 
     def execute_comprehensive_tests(self, watermarked_path: str,
                                     original_watermark_path: str,
@@ -394,6 +478,12 @@ class RobustnessTestSuite:
         """执行全面的鲁棒性测试"""
         logger.info("启动鲁棒性测试套件")
 
+        # 只解码一次宿主图像和原始水印，各项攻击均在内存中进行
+        watermarked_image = self.extractor.load_image(watermarked_path, cv2.IMREAD_COLOR)
+        original_watermark = self.analyzer.binarize(
+            self.extractor.load_image(original_watermark_path, cv2.IMREAD_GRAYSCALE)
+        )
+
         test_scenarios = [
             ("baseline_control", self._baseline_test),
             ("horizontal_flip", self._horizontal_flip_test),
@@ -403,43 +493,58 @@ class RobustnessTestSuite:
             ("jpeg_compression", self._compression_test)
         ]
 
-        for test_name, test_function in test_scenarios:
-            logger.info(f"执行测试: {test_name}")
-            try:
-                accuracy = test_function(watermarked_path, original_watermark_path, watermark_dimensions)
-                self.test_results[test_name] = accuracy
-                logger.info(f"{test_name} 测试完成: {accuracy:.2f}%")
-            except Exception as e:
-                logger.error(f"{test_name} 测试失败: {e}")
-                self.test_results[test_name] = 0.0
+        # 各项攻击相互独立，且耗时主要在释放GIL的OpenCV调用中，使用线程池并行执行
+        with ThreadPoolExecutor(max_workers=len(test_scenarios)) as executor:
+            futures = {}
+            for test_name, test_function in test_scenarios:
+                logger.info(f"执行测试: {test_name}")
+                futures[test_name] = executor.submit(
+                    test_function, watermarked_image, original_watermark, watermark_dimensions
+                )
+
+            for test_name, future in futures.items():
+                try:
+                    accuracy = future.result()
+                    self.test_results[test_name] = accuracy
+                    logger.info(f"{test_name} 测试完成: {accuracy:.2f}%")
+                except Exception as e:
+                    logger.error(f"{test_name} 测试失败: {e}")
+                    self.test_results[test_name] = 0.0
 
         self._generate_test_report()
         return self.test_results
 
-    def _baseline_test(self, watermarked_path: str, original_wm_path: str,
+    def _get_thread_extractor(self) -> LSBWatermarkExtractor:
+        """返回当前线程专用的提取器，避免并行测试共享提取统计信息"""
+        extractor = getattr(self._thread_state, 'extractor', None)
+        if extractor is None:
+            extractor = LSBWatermarkExtractor()
+            self._thread_state.extractor = extractor
+        return extractor
+
+    def _evaluate_attacked_image(self, attacked_img: np.ndarray, original_wm: np.ndarray,
+                                 wm_dims: Tuple[int, int], extracted_name: str) -> float:
+        """从受攻击图像中提取水印，保存提取结果并计算准确率"""
+        extractor = self._get_thread_extractor()
+        extracted_wm = extractor.extract_from_array(attacked_img, wm_dims)
+        extractor.save_image(extracted_wm, str(self.output_dir / extracted_name))
+        return self.analyzer.compare_arrays(original_wm, extracted_wm, already_binary=True)
+
+    def _baseline_test(self, img: np.ndarray, original_wm: np.ndarray,
                        wm_dims: Tuple[int, int]) -> float:
         """基线测试（无攻击）"""
-        extracted_path = self.output_dir / "baseline_extracted.png"
-        self.extractor.extract_watermark_from_image(watermarked_path, wm_dims, str(extracted_path))
-        return self.analyzer.compute_pixel_accuracy(original_wm_path, str(extracted_path))
+        return self._evaluate_attacked_image(img, original_wm, wm_dims, "baseline_extracted.png")
 
-    def _horizontal_flip_test(self, watermarked_path: str, original_wm_path: str,
+    def _horizontal_flip_test(self, img: np.ndarray, original_wm: np.ndarray,
                               wm_dims: Tuple[int, int]) -> float:
         """水平翻转攻击测试"""
-        img = cv2.imread(watermarked_path)
         flipped_img = cv2.flip(img, 1)
+        return self._evaluate_attacked_image(flipped_img, original_wm, wm_dims,
+                                             "extracted_horizontal_flip.png")
 
-        attacked_path = self.output_dir / "attacked_horizontal_flip.png"
-        extracted_path = self.output_dir / "extracted_horizontal_flip.png"
-
-        cv2.imwrite(str(attacked_path), flipped_img)
-        self.extractor.extract_watermark_from_image(str(attacked_path), wm_dims, str(extracted_path))
-        return self.analyzer.compute_pixel_accuracy(original_wm_path, str(extracted_path))
-
-    def _translation_test(self, watermarked_path: str, original_wm_path: str,
+    def _translation_test(self, img: np.ndarray, original_wm: np.ndarray,
                           wm_dims: Tuple[int, int]) -> float:
         """几何平移攻击测试"""
-        img = cv2.imread(watermarked_path)
         h, w = img.shape[:2]
 
         # 平移参数
@@ -447,77 +552,73 @@ class RobustnessTestSuite:
         transformation_matrix = np.float32([[1, 0, translation_x], [0, 1, translation_y]])
         translated_img = cv2.warpAffine(img, transformation_matrix, (w, h))
 
-        attacked_path = self.output_dir / "attacked_translation.png"
-        extracted_path = self.output_dir / "extracted_translation.png"
+        return self._evaluate_attacked_image(translated_img, original_wm, wm_dims,
+                                             "extracted_translation.png")
 
-        cv2.imwrite(str(attacked_path), translated_img)
-        self.extractor.extract_watermark_from_image(str(attacked_path), wm_dims, str(extracted_path))
-        return self.analyzer.compute_pixel_accuracy(original_wm_path, str(extracted_path))
-
-    def _cropping_test(self, watermarked_path: str, original_wm_path: str,
+    def _cropping_test(self, img: np.ndarray, original_wm: np.ndarray,
                        wm_dims: Tuple[int, int]) -> float:
         """区域裁剪攻击测试"""
-        img = cv2.imread(watermarked_path)
         h, w = img.shape[:2]
 
         # 保留75%的区域
         crop_ratio = 0.75
         cropped_img = img[0:int(h * crop_ratio), 0:int(w * crop_ratio)]
 
-        attacked_path = self.output_dir / "attacked_cropping.png"
-        extracted_path = self.output_dir / "extracted_cropping.png"
-
-        cv2.imwrite(str(attacked_path), cropped_img)
-
         try:
-            self.extractor.extract_watermark_from_image(str(attacked_path), wm_dims, str(extracted_path))
-            return self.analyzer.compute_pixel_accuracy(original_wm_path, str(extracted_path))
+            return self._evaluate_attacked_image(cropped_img, original_wm, wm_dims,
+                                                 "extracted_cropping.png")
         except ValueError:
             logger.warning("裁剪攻击导致提取失败，这是预期结果")
             return 0.0
 
-    def _contrast_test(self, watermarked_path: str, original_wm_path: str,
+    def _contrast_test(self, img: np.ndarray, original_wm: np.ndarray,
                        wm_dims: Tuple[int, int]) -> float:
         """对比度调整攻击测试"""
-        img = cv2.imread(watermarked_path)
-
         # 对比度和亮度调整参数
         contrast_factor = 1.4
         brightness_offset = 15
         enhanced_img = cv2.convertScaleAbs(img, alpha=contrast_factor, beta=brightness_offset)
 
-        attacked_path = self.output_dir / "attacked_contrast.png"
-        extracted_path = self.output_dir / "extracted_contrast.png"
-
-        cv2.imwrite(str(attacked_path), enhanced_img)
-        self.extractor.extract_watermark_from_image(str(attacked_path), wm_dims, str(extracted_path))
-        return self.analyzer.compute_pixel_accuracy(original_wm_path, str(extracted_path))
+        return self._evaluate_attacked_image(enhanced_img, original_wm, wm_dims,
+                                             "extracted_contrast.png")
 
-    def _compression_test(self, watermarked_path: str, original_wm_path: str,
+    def _compression_test(self, img: np.ndarray, original_wm: np.ndarray,
                           wm_dims: Tuple[int, int]) -> float:
         """JPEG压缩攻击测试"""
-        img = cv2.imread(watermarked_path)
-
-        attacked_path = self.output_dir / "attacked_compression.jpg"
-        extracted_path = self.output_dir / "extracted_compression.png"
-
-        # 80%质量的JPEG压缩
+        # 80%质量的JPEG压缩，在内存中完成编解码，不经过磁盘
         compression_quality = 80
-        cv2.imwrite(str(attacked_path), img, [cv2.IMWRITE_JPEG_QUALITY, compression_quality])
-        self.extractor.extract_watermark_from_image(str(attacked_path), wm_dims, str(extracted_path))
-        return self.analyzer.compute_pixel_accuracy(original_wm_path, str(extracted_path))
+        success, encoded = cv2.imencode('.jpg', img, [cv2.IMWRITE_JPEG_QUALITY, compression_quality])
+        if not success:
+            raise IOError("JPEG编码失败")
+        compressed_img = cv2.imdecode(encoded, cv2.IMREAD_COLOR)
+
+        return self._evaluate_attacked_image(compressed_img, original_wm, wm_dims,
+                                             "extracted_compression.png")
 
     def _generate_test_report(self):
         """生成测试报告"""
         report_path = self.output_dir / "robustness_test_report.json"
+
+        # 单次遍历同时统计总和、最佳和最差结果
+        total = 0.0
+        best = ('', float('-inf'))
+        worst = ('', float('inf'))
+        for test_name, accuracy in self.test_results.items():
+            total += accuracy
+            if accuracy > best[1]:
+                best = (test_name, accuracy)
+            if accuracy < worst[1]:
+                worst = (test_name, accuracy)
+        self.average_accuracy = total / len(self.test_results)
+
         report_data = {
             'timestamp': datetime.now().isoformat(),
             'test_results': self.test_results,
             'summary': {
                 'total_tests': len(self.test_results),
-                'average_accuracy': sum(self.test_results.values()) / len(self.test_results),
-                'best_performance': max(self.test_results.items(), key=lambda x: x[1]),
-                'worst_performance': min(self.test_results.items(), key=lambda x: x[1])
+                'average_accuracy': self.average_accuracy,
+                'best_performance': best,
+                'worst_performance': worst
             }
         }
 
@@ -592,7 +693,7 @@ class WatermarkSystemCLI:
             for test_name, accuracy in results.items():
                 print(f"{test_name:<25}: {accuracy:>6.2f}%")
 
-            average_score = sum(results.values()) / len(results)
+            average_score = self.test_suite.average_accuracy
             print(f"{'平均准确率':<25}: {average_score:>6.2f}%")
             print("=" * 40)
 
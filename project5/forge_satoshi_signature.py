@@ -1,7 +1,43 @@
 import hashlib
-import random  # 添加random导入
-from sm2_ec import mod_inverse, point_multiply, point_add, Point, G  # 从sm2_ec导入G
-from sm2_params import n  # 只导入n，不导入G
+import os
+from functools import lru_cache
+from sm2_ec import point_add, Point, fixed_base_mul, odd_multiples, wnaf_mul as _wnaf_mul
+from sm2_params import n
+
+# 公钥点乘使用的wNAF窗口宽度，对应 2^(w-2) = 16 个奇数倍点
+_WNAF_WIDTH = 6
+
+
+def _rand_scalar(n, count=1):
+    """
+    批量生成 count 个 [1, n-1] 内均匀分布的随机标量
+    一次读取所有需要的随机字节，超出 n 整数倍范围的样本被拒绝以避免模偏差
+    """
+    nbytes = (n.bit_length() + 7) // 8
+    limit = (1 << (8 * nbytes)) // n * n
+
+    out = []
+    while len(out) < count:
+        buf = os.urandom(nbytes * (count - len(out)))
+        for i in range(0, len(buf), nbytes):
+            x = int.from_bytes(buf[i:i + nbytes], 'big')
+            if x < limit and x % n:
+                out.append(x % n)
+    return out
+
+
+@lru_cache(maxsize=128)
+def _odd_multiples(x, y):
+    """按公钥坐标缓存奇数倍点表 [P, 3P, 5P, ..., (2^(w-1)-1)P]"""
+    return tuple(odd_multiples(Point(x, y), _WNAF_WIDTH))
+
+
+def wnaf_mul(k, P):
+    """使用wNAF和按公钥缓存的奇数倍点表计算 k*P"""
+    if k == 0 or P.infinity:
+        return Point.infinity_point()
+
+    return _wnaf_mul(k, P, _WNAF_WIDTH, _odd_multiples(P.x, P.y))
 
 
 def forge_signature(public_key, message=None):
@@ -13,18 +49,20 @@ def forge_signature(public_key, message=None):
     返回: (forged_message, forged_signature)，伪造的消息和对应的签名
     """
     # 选择随机数 u 和 v
-    u = random.randint(1, n - 1)
-    v = random.randint(1, n - 1)
+    u, v = _rand_scalar(n, 2)
 
     # 计算点 R = u*G + v*PubKey
-    R = point_add(point_multiply(u, G), point_multiply(v, public_key))
+    R = point_add(fixed_base_mul(u), wnaf_mul(v, public_key))
     r = R.x % n
 
+    # v^(-1) mod n 只计算一次（pow 的模逆由 C 实现）
+    v_inv = pow(v, -1, n)
+
     # 计算 s = r * v^(-1) mod n
-    s = (r * mod_inverse(v, n)) % n
+    s = (r * v_inv) % n
 
     # 计算 e = r * u * v^(-1) mod n
-    e = (r * u * mod_inverse(v, n)) % n
+    e = (r * u * v_inv) % n
 
     # 如果提供了特定消息，我们需要找到一种方式让哈希值等于e
     # 这通常是不可行的，因此这里我们构造消息使其哈希值为e
@@ -39,6 +77,12 @@ def forge_signature(public_key, message=None):
     return forged_message, (r, s)
 
 
+@lru_cache(maxsize=1024)
+def _msg_e(message):
+    """计算消息摘要 e = SHA-256(message) mod n，重复验证同一消息时直接命中缓存"""
+    return int.from_bytes(hashlib.sha256(message).digest(), 'big') % n
+
+
 def verify_ecdsa(message, signature, public_key):
     """
     验证ECDSA签名
@@ -55,17 +99,17 @@ def verify_ecdsa(message, signature, public_key):
         return False
 
     # 2. 计算消息摘要e
-    e = int(hashlib.sha256(message).hexdigest(), 16) % n
+    e = _msg_e(bytes(message))
 
     # 3. 计算 s^(-1) mod n
-    s_inv = mod_inverse(s, n)
+    s_inv = pow(s, -1, n)
 
     # 4. 计算 u1 = e * s^(-1) mod n 和 u2 = r * s^(-1) mod n
     u1 = (e * s_inv) % n
     u2 = (r * s_inv) % n
 
     # 5. 计算点 R' = u1*G + u2*PubKey
-    R = point_add(point_multiply(u1, G), point_multiply(u2, public_key))
+    R = point_add(fixed_base_mul(u1), wnaf_mul(u2, public_key))
 
     if R.infinity:
         return False
@@ -1,14 +1,71 @@
 import random
+import sys
 from sm2_params import p, a, b, n, Gx, Gy
 
+# 可选依赖：gmpy2 (GMP) 大整数运算，未安装时回退到 Python 内置 int
+try:
+    import gmpy2
+    from gmpy2 import mpz
+    GMPY2_AVAILABLE = True
+except ImportError:
+    GMPY2_AVAILABLE = False
+    mpz = int
+
+# 可选后端：cffi 编译的 C 扩展 _sm2_native（由 sm2_native_build.py 生成）
+try:
+    from _sm2_native import ffi as _native_ffi, lib as _native_lib
+    NATIVE_AVAILABLE = True
+except ImportError:
+    NATIVE_AVAILABLE = False
+
+# 可选后端：Numba 编译的 SM2 素数域运算（32 比特字 + 特殊形式约简）
+# gmpy2 下单次标量乘法已与 Numba 内核相当，因此只在缺少 gmpy2 和 C 扩展时加载
+NUMBA_AVAILABLE = False
+if not GMPY2_AVAILABLE and not NATIVE_AVAILABLE:
+    try:
+        from sm2_field_nb import scalar_mult_jacobian as _nb_scalar_mult
+        NUMBA_AVAILABLE = True
+    except ImportError:
+        pass
+
+# Python 3.8+ 的 pow(k, -1, m) 由 C 实现求模逆
+_POW_INVERSE = sys.version_info >= (3, 8)
+
+# 域运算使用的曲线参数（gmpy2 可用时为 mpz）
+# 大整数路径保留通用的 % _p：在 Python 层按字拆分做特殊形式约简比一次 C 实现的取模慢数倍，
+# 特殊形式约简只在按字运算的 Numba 后端（sm2_field_nb.fp_reduce）中使用
+_p = mpz(p)
+_a = mpz(a)
+_b = mpz(b)
+
 
 class Point:
     """椭圆曲线上的点"""
 
+    __slots__ = ('x', 'y', 'infinity', '_x_bytes', '_y_bytes')
+
     def __init__(self, x, y):
-        self.x = x
-        self.y = y
+        # 坐标统一存为 int，保证 to_bytes 等调用方接口不变
+        self.x = int(x)
+        self.y = int(y)
         self.infinity = False
+        # 坐标的 32 字节大端编码，首次访问时计算
+        self._x_bytes = None
+        self._y_bytes = None
+
+    @property
+    def x_bytes(self):
+        """x 坐标的 32 字节大端编码（缓存）"""
+        if self._x_bytes is None:
+            self._x_bytes = self.x.to_bytes(32, byteorder='big')
+        return self._x_bytes
+
+    @property
+    def y_bytes(self):
+        """y 坐标的 32 字节大端编码（缓存）"""
+        if self._y_bytes is None:
+            self._y_bytes = self.y.to_bytes(32, byteorder='big')
+        return self._y_bytes
 
     @classmethod
     def infinity_point(cls):
@@ -30,13 +87,26 @@ class Point:
         return f"Point({hex(self.x)}, {hex(self.y)})"
 
 
-def extended_gcd(a, b):
-    """扩展欧几里得算法，计算模逆元素"""
-    if a == 0:
-        return b, 0, 1
-    else:
-        gcd, x, y = extended_gcd(b % a, a)
-        return gcd, y - (b // a) * x, x
+def _binary_mod_inverse(k, m):
+    """迭代二进制扩展 GCD 求模逆（m 为奇数），用于不支持 pow(k, -1, m) 的 Python 3.8 之前版本"""
+    u, v = k, m
+    x1, x2 = 1, 0
+    while u != 1 and v != 1:
+        if u == 0:
+            raise ValueError(f"模 {m} 下不存在逆元")
+        while not u & 1:
+            u >>= 1
+            x1 = x1 >> 1 if not x1 & 1 else (x1 + m) >> 1
+        while not v & 1:
+            v >>= 1
+            x2 = x2 >> 1 if not x2 & 1 else (x2 + m) >> 1
+        if u >= v:
+            u -= v
+            x1 -= x2
+        else:
+            v -= u
+            x2 -= x1
+    return (x1 if u == 1 else x2) % m
 
 
 def mod_inverse(k, p):
@@ -44,14 +114,57 @@ def mod_inverse(k, p):
     if k == 0:
         raise ZeroDivisionError("除数不能为 0")
 
+    if GMPY2_AVAILABLE:
+        try:
+            return int(gmpy2.invert(mpz(k) % p, p))
+        except ZeroDivisionError:
+            raise ValueError(f"模 {p} 下不存在逆元")
+
     # 处理负数
     k = k % p
 
-    gcd, x, y = extended_gcd(k, p)
-    if gcd != 1:
-        raise ValueError(f"模 {p} 下不存在逆元")
-    else:
-        return (x % p + p) % p
+    if _POW_INVERSE:
+        try:
+            return pow(k, -1, p)
+        except ValueError:
+            raise ValueError(f"模 {p} 下不存在逆元")
+    return _binary_mod_inverse(k, p)
+
+
+def batch_inverse(zs, p):
+    """
+    Montgomery 批量求逆：用 3(N-1) 次乘法和 1 次模逆求出 zs 中所有元素模 p 的逆
+    zs 中的元素必须均与 p 互素
+    """
+    if not zs:
+        return []
+
+    # 前缀积 prefix[i] = zs[0] * ... * zs[i]
+    prefix = [zs[0] % p]
+    for z in zs[1:]:
+        prefix.append(prefix[-1] * z % p)
+
+    inv = mod_inverse(prefix[-1], p)
+    result = [0] * len(zs)
+    for i in range(len(zs) - 1, 0, -1):
+        result[i] = inv * prefix[i - 1] % p
+        inv = inv * zs[i] % p
+    result[0] = inv
+    return result
+
+
+# 平方根指数 (p+1)/4，SM2 的 p ≡ 3 (mod 4)
+_SQRT_EXP = mpz((p + 1) // 4)
+
+
+def sqrt_mod_p(alpha):
+    """
+    计算 alpha^((p+1)/4) mod p，alpha 为二次剩余时即为其平方根
+    调用方需自行验证结果的平方等于 alpha
+    """
+    if GMPY2_AVAILABLE:
+        return int(gmpy2.powmod(alpha, _SQRT_EXP, _p))
+    return pow(alpha, _SQRT_EXP, p)
 
 
 def point_add(P, Q):
@@ -67,12 +180,14 @@ def point_add(P, Q):
         else:
             return point_double(P)
 
+    x1, y1, x2, y2 = mpz(P.x), mpz(P.y), mpz(Q.x), mpz(Q.y)
+
     # 计算斜率
-    slope = ((Q.y - P.y) * mod_inverse(Q.x - P.x, p)) % p
+    slope = ((y2 - y1) * mod_inverse(x2 - x1, p)) % _p
 
     # 计算 x3, y3
-    x3 = (slope ** 2 - P.x - Q.x) % p
-    y3 = (slope * (P.x - x3) - P.y) % p
+    x3 = (slope * slope - x1 - x2) % _p
+    y3 = (slope * (x1 - x3) - y1) % _p
 
     return Point(x3, y3)
 
@@ -85,45 +200,416 @@ def point_double(P):
     if P.y == 0:
         return Point.infinity_point()
 
+    x1, y1 = mpz(P.x), mpz(P.y)
+
     # 计算斜率
-    slope = ((3 * P.x ** 2 + a) * mod_inverse(2 * P.y, p)) % p
+    slope = ((3 * x1 * x1 + _a) * mod_inverse(2 * y1, p)) % _p
 
     # 计算 x3, y3
-    x3 = (slope ** 2 - 2 * P.x) % p
-    y3 = (slope * (P.x - x3) - P.y) % p
+    x3 = (slope * slope - 2 * x1) % _p
+    y3 = (slope * (x1 - x3) - y1) % _p
 
     return Point(x3, y3)
 
 
+class PointJac:
+    """Jacobian 射影坐标下的点 (X, Y, Z)，对应仿射点 (X/Z^2, Y/Z^3)，Z = 0 表示无穷远点"""
+
+    __slots__ = ('X', 'Y', 'Z')
+
+    def __init__(self, X, Y, Z):
+        self.X = X
+        self.Y = Y
+        self.Z = Z
+
+    @classmethod
+    def from_affine(cls, P):
+        """仿射点转换为 Jacobian 坐标"""
+        if P.infinity:
+            return cls(mpz(1), mpz(1), mpz(0))
+        return cls(mpz(P.x), mpz(P.y), mpz(1))
+
+    def to_affine(self):
+        """转换回仿射坐标，仅需一次模逆"""
+        if self.Z == 0:
+            return Point.infinity_point()
+        z_inv = mpz(mod_inverse(self.Z, p))
+        z_inv2 = z_inv * z_inv % _p
+        x = self.X * z_inv2 % _p
+        y = self.Y * z_inv2 * z_inv % _p
+        return Point(x, y)
+
+
+def batch_to_affine(points):
+    """把一组 Jacobian 点转换为仿射坐标，所有点共用一次模逆"""
+    finite = [J for J in points if J.Z != 0]
+    z_invs = iter(batch_inverse([J.Z for J in finite], _p))
+
+    result = []
+    for J in points:
+        if J.Z == 0:
+            result.append(Point.infinity_point())
+            continue
+        z_inv = next(z_invs)
+        z_inv2 = z_inv * z_inv % _p
+        result.append(Point(J.X * z_inv2 % _p, J.Y * z_inv2 * z_inv % _p))
+    return result
+
+
+# 标量乘法内层循环直接使用 (X, Y, Z) 元组，不创建对象
+_JAC_INFINITY = (mpz(1), mpz(1), mpz(0))
+
+
+def _jac_double(X1, Y1, Z1):
+    """Jacobian 坐标下的倍点运算（元组形式，无需模逆）"""
+    if Z1 == 0 or Y1 == 0:
+        return _JAC_INFINITY
+
+    YY = Y1 * Y1 % _p
+    ZZ = Z1 * Z1 % _p
+    S = 4 * X1 * YY % _p
+    M = (3 * X1 * X1 + _a * ZZ * ZZ) % _p
+    X3 = (M * M - 2 * S) % _p
+    Y3 = (M * (S - X3) - 8 * YY * YY) % _p
+    Z3 = 2 * Y1 * Z1 % _p
+    return X3, Y3, Z3
+
+
+def _jac_add_mixed(X1, Y1, Z1, x2, y2):
+    """Jacobian 点与有限仿射点 (x2, y2) 的混合加法（元组形式）"""
+    if Z1 == 0:
+        return mpz(x2), mpz(y2), mpz(1)
+
+    ZZ = Z1 * Z1 % _p
+    U2 = x2 * ZZ % _p
+    S2 = y2 * ZZ * Z1 % _p
+    H = (U2 - X1) % _p
+    R = (S2 - Y1) % _p
+
+    if H == 0:
+        if R == 0:
+            return _jac_double(X1, Y1, Z1)
+        return _JAC_INFINITY
+
+    HH = H * H % _p
+    HHH = H * HH % _p
+    V = X1 * HH % _p
+    X3 = (R * R - HHH - 2 * V) % _p
+    Y3 = (R * (V - X3) - Y1 * HHH) % _p
+    Z3 = Z1 * H % _p
+    return X3, Y3, Z3
+
+
+def jacobian_double(J):
+    """Jacobian 坐标下的倍点运算（无需模逆）"""
+    return PointJac(*_jac_double(J.X, J.Y, J.Z))
+
+
+def jacobian_add_mixed(J, Q):
+    """Jacobian 点 J 与仿射点 Q 相加（混合加法，Q 的 Z = 1）"""
+    if Q.infinity:
+        return J
+    return PointJac(*_jac_add_mixed(J.X, J.Y, J.Z, Q.x, Q.y))
+
+
+def _jacobian_double_unchecked(X1, Y1, Z1):
+    """
+    Jacobian 倍点专用公式，利用 SM2 的 a = p - 3：M = 3(X - Z^2)(X + Z^2)
+    调用方保证输入不是无穷远点且 Y != 0
+    """
+    YY = Y1 * Y1 % _p
+    ZZ = Z1 * Z1 % _p
+    S = 4 * X1 * YY % _p
+    M = 3 * (X1 - ZZ) * (X1 + ZZ) % _p
+    X3 = (M * M - 2 * S) % _p
+    Y3 = (M * (S - X3) - 8 * YY * YY) % _p
+    Z3 = 2 * Y1 * Z1 % _p
+    return X3, Y3, Z3
+
+
+def _jacobian_add_mixed_unchecked(X1, Y1, Z1, x2, y2):
+    """Jacobian 点与仿射点的混合加法，调用方保证两点均非无穷远点且互不相等、互不为逆"""
+    ZZ = Z1 * Z1 % _p
+    H = (x2 * ZZ - X1) % _p
+    R = (y2 * ZZ * Z1 - Y1) % _p
+    HH = H * H % _p
+    HHH = H * HH % _p
+    V = X1 * HH % _p
+    X3 = (R * R - HHH - 2 * V) % _p
+    Y3 = (R * (V - X3) - Y1 * HHH) % _p
+    Z3 = Z1 * H % _p
+    return X3, Y3, Z3
+
+
 def point_multiply(k, P):
     """标量乘法，k*P"""
+    # 曲线余因子为 1，所有点的阶均为 n
+    k %= n
     if k == 0 or P.infinity:
         return Point.infinity_point()
 
-    if k < 0:
-        return point_multiply(-k, Point(P.x, (-P.y) % p))
+    if NATIVE_AVAILABLE:
+        out_x = _native_ffi.new("unsigned char[32]")
+        out_y = _native_ffi.new("unsigned char[32]")
+        if not _native_lib.sm2_scalar_mul(k.to_bytes(32, byteorder='big'), P.x_bytes, P.y_bytes, out_x, out_y):
+            return Point.infinity_point()
+        return Point(int.from_bytes(_native_ffi.buffer(out_x), byteorder='big'),
+                     int.from_bytes(_native_ffi.buffer(out_y), byteorder='big'))
+
+    if NUMBA_AVAILABLE:
+        X, Y, Z = _nb_scalar_mult(k, P.x, P.y)
+        return PointJac(X, Y, Z).to_affine()
+
+    # 在 Jacobian 坐标下从高位到低位倍加，最后只做一次模逆
+    # k < n 时中间结果 k'P (1 <= k' < n) 既不会是无穷远点，也不会等于 ±P，可以使用无检查的公式
+    x2, y2 = mpz(P.x), mpz(P.y)
+    X, Y, Z = x2, y2, mpz(1)
+
+    for bit in bin(k)[3:]:
+        X, Y, Z = _jacobian_double_unchecked(X, Y, Z)
+        if bit == '1':
+            X, Y, Z = _jacobian_add_mixed_unchecked(X, Y, Z, x2, y2)
 
-    result = Point.infinity_point()
-    addend = P
+    return PointJac(X, Y, Z).to_affine()
 
+
+def _wnaf(k, w):
+    """计算 k 的宽度为 w 的 NAF 表示（低位在前），非零位为 (-2^(w-1), 2^(w-1)) 内的奇数"""
+    digits = []
+    modulus = 1 << w
     while k:
-        if k & 1:  # k 的二进制最低位为 1
-            result = point_add(result, addend)
-        addend = point_double(addend)
-        k >>= 1  # k 右移一位
+        if k & 1:
+            digit = k % modulus
+            if digit >= modulus >> 1:
+                digit -= modulus
+            k -= digit
+        else:
+            digit = 0
+        digits.append(digit)
+        k >>= 1
+    return digits
+
+
+def odd_multiples(P, w=5):
+    """计算 wNAF 所需的奇数倍点表 [P, 3P, 5P, ..., (2^(w-1)-1)P]（仿射坐标）"""
+    P2 = point_double(P)
+    table = [PointJac.from_affine(P)]
+    for _ in range((1 << (w - 2)) - 1):
+        table.append(jacobian_add_mixed(table[-1], P2))
+    return batch_to_affine(table)
+
+
+def wnaf_mul(k, P, w=5, table=None):
+    """
+    使用 wNAF 计算任意点的标量乘法 k*P
+    table 为可选的预计算奇数倍点表（由 odd_multiples(P, w) 生成），便于对同一点重复使用
+    """
+    if k == 0 or P.infinity:
+        return Point.infinity_point()
 
-    return result
+    if k < 0:
+        return wnaf_mul(-k, Point(P.x, (-P.y) % p), w)
+
+    if table is None:
+        table = odd_multiples(P, w)
+
+    X, Y, Z = _JAC_INFINITY
+    for digit in reversed(_wnaf(k, w)):
+        X, Y, Z = _jac_double(X, Y, Z)
+        if digit > 0:
+            Q = table[digit >> 1]
+            X, Y, Z = _jac_add_mixed(X, Y, Z, Q.x, Q.y)
+        elif digit < 0:
+            Q = table[(-digit) >> 1]
+            X, Y, Z = _jac_add_mixed(X, Y, Z, Q.x, p - Q.y)
+
+    return PointJac(X, Y, Z).to_affine()
+
+
+def _jac_add(X1, Y1, Z1, X2, Y2, Z2):
+    """两个 Jacobian 点相加（元组形式）"""
+    if Z1 == 0:
+        return X2, Y2, Z2
+    if Z2 == 0:
+        return X1, Y1, Z1
+
+    Z1Z1 = Z1 * Z1 % _p
+    Z2Z2 = Z2 * Z2 % _p
+    U1 = X1 * Z2Z2 % _p
+    U2 = X2 * Z1Z1 % _p
+    S1 = Y1 * Z2 * Z2Z2 % _p
+    S2 = Y2 * Z1 * Z1Z1 % _p
+    H = (U2 - U1) % _p
+    R = (S2 - S1) % _p
+
+    if H == 0:
+        if R == 0:
+            return _jac_double(X1, Y1, Z1)
+        return _JAC_INFINITY
+
+    HH = H * H % _p
+    HHH = H * HH % _p
+    V = U1 * HH % _p
+    X3 = (R * R - HHH - 2 * V) % _p
+    Y3 = (R * (V - X3) - S1 * HHH) % _p
+    Z3 = Z1 * Z2 * H % _p
+    return X3, Y3, Z3
+
+
+def _cswap(bit, A, B):
+    """bit 为 1 时交换 A、B 两个 Jacobian 元组，用掩码运算代替条件分支"""
+    mask = -bit
+    swapped_a = []
+    swapped_b = []
+    for a_i, b_i in zip(A, B):
+        d = (a_i ^ b_i) & mask
+        swapped_a.append(a_i ^ d)
+        swapped_b.append(b_i ^ d)
+    return tuple(swapped_a), tuple(swapped_b)
+
+
+def ct_scalar_mul(k, P):
+    """
+    Montgomery 阶梯标量乘法 k*P，每个比特固定执行一次加法和一次倍点，用于私钥、随机数等秘密标量
+    标量先变换为 k + n 或 k + 2n，使其固定为 257 比特，循环次数与 k 的取值无关
+    注意：Python 大整数运算本身不是常数时间的，这里只消除了由算法分支和比特模式带来的时间差异
+    """
+    k %= n
+    if k == 0 or P.infinity:
+        return Point.infinity_point()
+
+    # k + n 不足 257 比特时再加一个 n，选择通过算术完成
+    k1 = k + n
+    k1 += (1 - (k1 >> 256)) * n
+
+    R0 = (mpz(P.x), mpz(P.y), mpz(1))
+    R1 = _jac_double(*R0)
+    for i in range(255, -1, -1):
+        bit = (k1 >> i) & 1
+        R0, R1 = _cswap(bit, R0, R1)
+        R1 = _jac_add(*R0, *R1)
+        R0 = _jac_double(*R0)
+        R0, R1 = _cswap(bit, R0, R1)
+
+    return PointJac(*R0).to_affine()
 
 
 # 基点 G
 G = Point(Gx, Gy)
 
+# 基点 G 的 Lim-Lee comb 预计算参数：COMB_W 个齿、齿间距 COMB_D 比特，覆盖 256 比特标量
+COMB_W = 8
+COMB_D = 32
+_G_COMB = None
+
+# mul_add 中基点 G 使用更宽的 wNAF 窗口，奇数倍点表只需构建一次
+G_WNAF_WIDTH = 7
+_G_ODD_MULTIPLES = None
+
+
+def build_comb(P, w=COMB_W, d=COMB_D):
+    """
+    构建点 P 的 comb 预计算表
+    table[j] = sum(2^(i*d) * P)，其中 i 取遍 j 的二进制中为 1 的位，共 2^w 项（仿射坐标）
+    """
+    # 各齿的基点 2^(i*d) * P 在 Jacobian 坐标下连续倍点得到，最后统一转换为仿射坐标
+    J = PointJac.from_affine(P)
+    bases = [J]
+    for _ in range(1, w):
+        for _ in range(d):
+            J = jacobian_double(J)
+        bases.append(J)
+    bases = batch_to_affine(bases)
+
+    # 表项以 Jacobian 坐标累加，全部构建完后只做一次批量求逆
+    table = [PointJac(*_JAC_INFINITY)]
+    for i, base in enumerate(bases):
+        table.extend(jacobian_add_mixed(table[j], base) for j in range(1 << i))
+    return batch_to_affine(table)
+
+
+def _get_g_comb():
+    """惰性构建基点 G 的 comb 表"""
+    global _G_COMB
+    if _G_COMB is None:
+        _G_COMB = build_comb(G)
+    return _G_COMB
+
+
+def fixed_base_mul(k):
+    """使用 comb 预计算表计算 k*G：COMB_D-1 次倍点和至多 COMB_D 次混合加法"""
+    table = _get_g_comb()
+    k %= n
+    if k == 0:
+        return Point.infinity_point()
+
+    # 把 k 切成 COMB_W 行，每行 COMB_D 比特
+    mask = (1 << COMB_D) - 1
+    rows = [(k >> (i * COMB_D)) & mask for i in range(COMB_W)]
+
+    X, Y, Z = _JAC_INFINITY
+    for col in range(COMB_D - 1, -1, -1):
+        X, Y, Z = _jac_double(X, Y, Z)
+        idx = 0
+        for i in range(COMB_W):
+            idx |= ((rows[i] >> col) & 1) << i
+        if idx:
+            Q = table[idx]
+            X, Y, Z = _jac_add_mixed(X, Y, Z, Q.x, Q.y)
+
+    return PointJac(X, Y, Z).to_affine()
+
 
 def is_on_curve(P):
     """检查点 P 是否在椭圆曲线上"""
     if P.infinity:
         return True
 
-    left = (P.y ** 2) % p
-    right = (P.x ** 3 + a * P.x + b) % p
+    x, y = mpz(P.x), mpz(P.y)
+    left = (y * y) % _p
+    right = (x * x * x + _a * x + _b) % _p
     return left == right
+
+
+def _get_g_odd_multiples():
+    """惰性构建基点 G 的 wNAF 奇数倍点表"""
+    global _G_ODD_MULTIPLES
+    if _G_ODD_MULTIPLES is None:
+        _G_ODD_MULTIPLES = odd_multiples(G, G_WNAF_WIDTH)
+    return _G_ODD_MULTIPLES
+
+
+def mul_add(k1, P1, k2, P2, w=5):
+    """
+    同时计算 k1*P1 + k2*P2（Shamir 技巧 / 交错 wNAF）
+    两个标量共用一条倍点链，倍点次数约为单次标量乘法的一半；P1 为基点 G 时复用 G 的静态预计算表
+    """
+    terms = []
+    for k, P in ((k1, P1), (k2, P2)):
+        k %= n
+        if k == 0 or P.infinity:
+            continue
+        if P == G:
+            terms.append((_wnaf(k, G_WNAF_WIDTH), _get_g_odd_multiples()))
+        else:
+            terms.append((_wnaf(k, w), odd_multiples(P, w)))
+
+    if not terms:
+        return Point.infinity_point()
+
+    length = max(len(digits) for digits, _ in terms)
+    X, Y, Z = _JAC_INFINITY
+    for i in range(length - 1, -1, -1):
+        X, Y, Z = _jac_double(X, Y, Z)
+        for digits, table in terms:
+            if i >= len(digits):
+                continue
+            digit = digits[i]
+            if digit > 0:
+                Q = table[digit >> 1]
+                X, Y, Z = _jac_add_mixed(X, Y, Z, Q.x, Q.y)
+            elif digit < 0:
+                Q = table[(-digit) >> 1]
+                X, Y, Z = _jac_add_mixed(X, Y, Z, Q.x, p - Q.y)
+
+    return PointJac(X, Y, Z).to_affine()
@@ -1,5 +1,5 @@
-from sm2_params import n, G
-from sm2_ec import point_multiply, mod_inverse
+from sm2_params import n
+from sm2_ec import mod_inverse, fixed_base_mul
 
 
 def ecdsa_sign(message, private_key, k):
@@ -7,7 +7,7 @@ def ecdsa_sign(message, private_key, k):
     e = sm3_hash(message)  # 使用相同的哈希函数
 
     # 计算 (x1,y1) = k*G
-    point = point_multiply(k, G)
+    point = fixed_base_mul(k)
     x1 = point.x
 
     # ECDSA签名
@@ -86,7 +86,7 @@ def poc_sm2_ecdsa_same_key():
     message = b"Message for both SM2 and ECDSA"
 
     # SM2签名
-    point = point_multiply(k, G)
+    point = fixed_base_mul(k)
     x1 = point.x
     e = sm3_hash(message)
     r_sm2 = (e + x1) % n
@@ -2,7 +2,7 @@ import os
 import hashlib
 import random  # 添加random导入
 from sm2_params import n
-from sm2_ec import G, Point, point_multiply, is_on_curve
+from sm2_ec import Point, is_on_curve, fixed_base_mul, wnaf_mul, ct_scalar_mul
 
 
 def kdf(Z, klen):
@@ -11,15 +11,26 @@ def kdf(Z, klen):
     Z: 输入的字节串
     klen: 需要的密钥长度(比特)
     """
-    ct = 1
-    K = b''
     v = 32  # SM3摘要长度为32字节(256比特)
 
-    for i in range((klen + 255) // 256):  # 向上取整
-        K += hashlib.sha256(Z + ct.to_bytes(4, byteorder='big')).digest()
-        ct += 1
+    nblocks = (klen + 255) // 256  # 向上取整
+    out = bytearray(nblocks * v)  # 一次性分配输出缓冲区，按块写入
 
-    return K[:((klen + 7) // 8)]  # 转换为字节长度并截取所需长度
+    # Z 只吸收一次，每个计数器从该状态的副本继续计算
+    h0 = hashlib.sha256(Z)
+    for i in range(nblocks):
+        h = h0.copy()
+        h.update((i + 1).to_bytes(4, byteorder='big'))
+        out[i * v:(i + 1) * v] = h.digest()
+
+    del out[(klen + 7) // 8:]  # 转换为字节长度并截取所需长度
+    return bytes(out)
+
+
+def _xor_bytes(data, mask):
+    """按字节异或两个等长字节串，借助大整数一次完成"""
+    length = len(data)
+    return (int.from_bytes(data, 'big') ^ int.from_bytes(mask[:length], 'big')).to_bytes(length, 'big')
 
 
 def encrypt(message, public_key):
@@ -35,33 +46,35 @@ def encrypt(message, public_key):
         k = random.randint(1, n - 1)
 
         # 2. 计算 C1 = k*G
-        C1 = point_multiply(k, G)
+        C1 = fixed_base_mul(k)
 
         # 将C1编码为字节串
-        C1_encoded = b'\x04' + C1.x.to_bytes(32, byteorder='big') + C1.y.to_bytes(32, byteorder='big')
+        C1_encoded = b'\x04' + C1.x_bytes + C1.y_bytes
 
         # 3. 计算 kP = k*PB = (x2, y2)
-        kP = point_multiply(k, public_key)
+        kP = wnaf_mul(k, public_key)
 
         if kP.infinity:
             continue
 
         # 4. 计算 t = KDF(x2||y2, klen)
-        x2_bytes = kP.x.to_bytes(32, byteorder='big')
-        y2_bytes = kP.y.to_bytes(32, byteorder='big')
+        x2_bytes = kP.x_bytes
+        y2_bytes = kP.y_bytes
         Z = x2_bytes + y2_bytes
         t = kdf(Z, message_len * 8)
 
         # 检查t是否全为0
-        if all(b == 0 for b in t):
+        if not any(t):
             continue
 
         # 5. 计算 C2 = M ⊕ t
-        C2 = bytes(m ^ t[i] for i, m in enumerate(message))
+        C2 = _xor_bytes(message, t)
 
         # 6. 计算 C3 = Hash(x2 || M || y2)
-        h = hashlib.sha256()
-        h.update(x2_bytes + message + y2_bytes)
+        # 分段送入哈希，避免拼接出消息长度的临时字节串
+        h = hashlib.sha256(x2_bytes)
+        h.update(message)
+        h.update(y2_bytes)
         C3 = h.digest()
 
         # 7. 输出密文 C = C1 || C3 || C2
@@ -94,23 +107,25 @@ def decrypt(ciphertext, private_key):
     C2 = ciphertext[97:]
 
     # 2. 计算 d*C1 = (x2, y2)
-    dC1 = point_multiply(private_key, C1)
+    # 私钥参与的点乘使用 Montgomery 阶梯，运算序列与私钥比特无关
+    dC1 = ct_scalar_mul(private_key, C1)
 
     if dC1.infinity:
         raise ValueError("无效的点乘结果")
 
     # 3. 计算 t = KDF(x2||y2, klen)，klen为C2的比特长度
-    x2_bytes = dC1.x.to_bytes(32, byteorder='big')
-    y2_bytes = dC1.y.to_bytes(32, byteorder='big')
+    x2_bytes = dC1.x_bytes
+    y2_bytes = dC1.y_bytes
     Z = x2_bytes + y2_bytes
     t = kdf(Z, len(C2) * 8)
 
     # 4. 计算 M' = C2 ⊕ t
-    message = bytes(c ^ t[i] for i, c in enumerate(C2))
+    message = _xor_bytes(C2, t)
 
     # 5. 计算 u = Hash(x2 || M' || y2)
-    h = hashlib.sha256()
-    h.update(x2_bytes + message + y2_bytes)
+    h = hashlib.sha256(x2_bytes)
+    h.update(message)
+    h.update(y2_bytes)
     u = h.digest()
 
     # 6. 验证 u == C3
@@ -0,0 +1,256 @@
+# SM2 素数域运算的 Numba 实现
+# 256 比特域元素表示为 8 个 32 比特字（小端，存放在 uint64 数组中），
+# 字与字的乘积不超过 64 比特，可以用 Numba 的原生整数完成全部运算
+import numpy as np
+from numba import njit
+
+from sm2_params import p
+
+# 字宽与字数
+WORD_BITS = 32
+WORD_MASK = 0xFFFFFFFF
+NWORDS = 8
+
+# Numba 中 uint64 与 int64 混合运算会提升为 float64，按类型分别准备常量
+_U_MASK = np.uint64(WORD_MASK)
+_U_SHIFT = np.uint64(WORD_BITS)
+_I_MASK = np.int64(WORD_MASK)
+_I_SHIFT = np.int64(WORD_BITS)
+
+
+def to_limbs(x):
+    """Python 整数转换为 8 个 32 比特字"""
+    return np.array([(x >> (WORD_BITS * i)) & WORD_MASK for i in range(NWORDS)], dtype=np.uint64)
+
+
+def from_limbs(a):
+    """8 个 32 比特字转换回 Python 整数"""
+    x = 0
+    for i in range(NWORDS - 1, -1, -1):
+        x = (x << WORD_BITS) | int(a[i])
+    return x
+
+
+_P = to_limbs(p)
+
+
+@njit(cache=True)
+def _geq_p(a):
+    """判断 a >= p"""
+    for i in range(NWORDS - 1, -1, -1):
+        if a[i] != _P[i]:
+            return a[i] > _P[i]
+    return True
+
+
+@njit(cache=True)
+def _sub_p(a):
+    """原地计算 a - p（调用方保证 a >= p 或存在进位）"""
+    borrow = np.int64(0)
+    for i in range(NWORDS):
+        v = np.int64(a[i]) - np.int64(_P[i]) - borrow
+        if v < 0:
+            v += np.int64(1) << _I_SHIFT
+            borrow = 1
+        else:
+            borrow = 0
+        a[i] = np.uint64(v)
+
+
+@njit(cache=True)
+def fp_add(a, b):
+    """模 p 加法"""
+    r = np.empty(NWORDS, dtype=np.uint64)
+    carry = np.uint64(0)
+    for i in range(NWORDS):
+        v = a[i] + b[i] + carry
+        r[i] = v & _U_MASK
+        carry = v >> _U_SHIFT
+    if carry or _geq_p(r):
+        _sub_p(r)
+    return r
+
+
+@njit(cache=True)
+def fp_sub(a, b):
+    """模 p 减法"""
+    r = np.empty(NWORDS, dtype=np.uint64)
+    borrow = np.int64(0)
+    for i in range(NWORDS):
+        v = np.int64(a[i]) - np.int64(b[i]) - borrow
+        if v < 0:
+            v += np.int64(1) << _I_SHIFT
+            borrow = 1
+        else:
+            borrow = 0
+        r[i] = np.uint64(v)
+    if borrow:
+        carry = np.uint64(0)
+        for i in range(NWORDS):
+            v = r[i] + _P[i] + carry
+            r[i] = v & _U_MASK
+            carry = v >> _U_SHIFT
+    return r
+
+
+@njit(cache=True)
+def fp_reduce(c):
+    """
+    利用 SM2 素数的特殊形式（Solinas 约简）约简 16 字的乘积，c 为 int64 数组，会被原地修改
+    p = 2^256 - 2^224 - 2^96 + 2^64 - 1，因此 2^256 ≡ 2^224 + 2^96 - 2^64 + 1 (mod p)，
+    高位字 c[i] (i >= 8) 折叠为 c[i-8]、c[i-6]、c[i-5]、c[i-1] 上的加减，不需要任何除法
+    """
+    while True:
+        for i in range(2 * NWORDS - 1, NWORDS - 1, -1):
+            h = c[i]
+            if h != 0:
+                c[i] = 0
+                j = i - NWORDS
+                c[j] += h
+                c[j + 2] -= h
+                c[j + 3] += h
+                c[j + 7] += h
+
+        for i in range(NWORDS):
+            v = c[i]
+            c[i] = v & _I_MASK
+            c[i + 1] += v >> _I_SHIFT
+
+        if c[NWORDS] == 0:
+            break
+
+    r = np.empty(NWORDS, dtype=np.uint64)
+    for i in range(NWORDS):
+        r[i] = np.uint64(c[i])
+    if _geq_p(r):
+        _sub_p(r)
+    return r
+
+
+@njit(cache=True)
+def fp_mul(a, b):
+    """模 p 乘法：8x8 字教科书乘法后做特殊形式约简"""
+    c = np.zeros(2 * NWORDS + 1, dtype=np.int64)
+    for i in range(NWORDS):
+        ai = a[i]
+        for j in range(NWORDS):
+            t = ai * b[j]
+            c[i + j] += np.int64(t & _U_MASK)
+            c[i + j + 1] += np.int64(t >> _U_SHIFT)
+    return fp_reduce(c)
+
+
+@njit(cache=True)
+def _sqr_n(a, k):
+    """连续平方 k 次"""
+    for _ in range(k):
+        a = fp_mul(a, a)
+    return a
+
+
+@njit(cache=True)
+def fp_inv(a):
+    """
+    费马小定理求逆 a^(p-2) mod p
+    p-2 的二进制为 1{31} 0 1{128} 0{32} 1{62} 0 1，使用固定加法链：
+    先构造 x_k = a^(2^k - 1)，再按比特段拼接，共 383 次平方和 14 次乘法（逐比特方法约需 220 次额外乘法）
+    """
+    x1 = a
+    x2 = fp_mul(_sqr_n(x1, 1), x1)
+    x3 = fp_mul(_sqr_n(x2, 1), x1)
+    x6 = fp_mul(_sqr_n(x3, 3), x3)
+    x12 = fp_mul(_sqr_n(x6, 6), x6)
+    x15 = fp_mul(_sqr_n(x12, 3), x3)
+    x30 = fp_mul(_sqr_n(x15, 15), x15)
+    x31 = fp_mul(_sqr_n(x30, 1), x1)
+    x32 = fp_mul(_sqr_n(x31, 1), x1)
+    x62 = fp_mul(_sqr_n(x31, 31), x31)
+    x64 = fp_mul(_sqr_n(x32, 32), x32)
+    x128 = fp_mul(_sqr_n(x64, 64), x64)
+
+    r = fp_mul(_sqr_n(x31, 1 + 128), x128)
+    r = fp_mul(_sqr_n(r, 32 + 62), x62)
+    return fp_mul(_sqr_n(r, 2), x1)
+
+
+@njit(cache=True)
+def _is_zero(a):
+    for i in range(NWORDS):
+        if a[i] != 0:
+            return False
+    return True
+
+
+@njit(cache=True)
+def jacobian_double(X1, Y1, Z1):
+    """Jacobian 倍点，利用 SM2 的 a = -3：M = 3(X - Z^2)(X + Z^2)"""
+    if _is_zero(Z1) or _is_zero(Y1):
+        return X1, Y1, np.zeros(NWORDS, dtype=np.uint64)
+
+    YY = fp_mul(Y1, Y1)
+    ZZ = fp_mul(Z1, Z1)
+    S = fp_mul(X1, YY)
+    S = fp_add(S, S)
+    S = fp_add(S, S)
+    M = fp_mul(fp_sub(X1, ZZ), fp_add(X1, ZZ))
+    M = fp_add(fp_add(M, M), M)
+    X3 = fp_sub(fp_mul(M, M), fp_add(S, S))
+    YYYY = fp_mul(YY, YY)
+    YYYY2 = fp_add(YYYY, YYYY)
+    YYYY4 = fp_add(YYYY2, YYYY2)
+    Y3 = fp_sub(fp_mul(M, fp_sub(S, X3)), fp_add(YYYY4, YYYY4))
+    Z3 = fp_mul(Y1, Z1)
+    Z3 = fp_add(Z3, Z3)
+    return X3, Y3, Z3
+
+
+@njit(cache=True)
+def jacobian_add_mixed(X1, Y1, Z1, x2, y2):
+    """Jacobian 点与仿射点 (x2, y2) 的混合加法"""
+    if _is_zero(Z1):
+        one = np.zeros(NWORDS, dtype=np.uint64)
+        one[0] = 1
+        return x2.copy(), y2.copy(), one
+
+    ZZ = fp_mul(Z1, Z1)
+    U2 = fp_mul(x2, ZZ)
+    S2 = fp_mul(y2, fp_mul(ZZ, Z1))
+    H = fp_sub(U2, X1)
+    R = fp_sub(S2, Y1)
+
+    if _is_zero(H):
+        if _is_zero(R):
+            return jacobian_double(X1, Y1, Z1)
+        return X1, Y1, np.zeros(NWORDS, dtype=np.uint64)
+
+    HH = fp_mul(H, H)
+    HHH = fp_mul(H, HH)
+    V = fp_mul(X1, HH)
+    X3 = fp_sub(fp_sub(fp_mul(R, R), HHH), fp_add(V, V))
+    Y3 = fp_sub(fp_mul(R, fp_sub(V, X3)), fp_mul(Y1, HHH))
+    Z3 = fp_mul(Z1, H)
+    return X3, Y3, Z3
+
+
+@njit(cache=True)
+def _scalar_mult_kernel(bits, x, y):
+    """从高位到低位的倍加循环，bits[0] 为最高位且必须为 1"""
+    X = x.copy()
+    Y = y.copy()
+    Z = np.zeros(NWORDS, dtype=np.uint64)
+    Z[0] = 1
+    for i in range(1, bits.shape[0]):
+        X, Y, Z = jacobian_double(X, Y, Z)
+        if bits[i]:
+            X, Y, Z = jacobian_add_mixed(X, Y, Z, x, y)
+    return X, Y, Z
+
+
+def scalar_mult_jacobian(k, x, y):
+    """
+    计算 k*(x, y)，结果以 Jacobian 坐标的整数三元组 (X, Y, Z) 返回
+    k 必须为正整数，(x, y) 为曲线上的仿射点
+    """
+    bits = np.frombuffer(bin(k)[2:].encode(), dtype=np.uint8) - ord('0')
+    X, Y, Z = _scalar_mult_kernel(bits, to_limbs(x), to_limbs(y))
+    return from_limbs(X), from_limbs(Y), from_limbs(Z)
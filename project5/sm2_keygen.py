@@ -1,6 +1,6 @@
 import random
 from sm2_params import n, p, a, b
-from sm2_ec import G, point_multiply, Point
+from sm2_ec import Point, fixed_base_mul, sqrt_mod_p
 
 
 def generate_key_pair():
@@ -9,7 +9,7 @@ def generate_key_pair():
     d = random.randint(1, n - 2)
 
     # 计算公钥 P = d * G
-    P = point_multiply(d, G)
+    P = fixed_base_mul(d)
 
     return d, P
 
@@ -22,7 +22,7 @@ def compress_public_key(P):
     # 判断y坐标的奇偶性
     prefix = 3 if P.y & 1 else 2
     # 返回压缩公钥
-    return bytes([prefix]) + P.x.to_bytes(32, byteorder='big')
+    return bytes([prefix]) + P.x_bytes
 
 
 def decompress_public_key(compressed_key):
@@ -33,20 +33,21 @@ def decompress_public_key(compressed_key):
     x = int.from_bytes(compressed_key[1:], byteorder='big')
     prefix = compressed_key[0]
 
-    # 计算 y²
-    alpha = (pow(x, 3, p) + a * x + b) % p
+    if x >= p:
+        raise ValueError("解压缩得到的点不在曲线上")
+
+    # 计算 y² = x³ + ax + b
+    alpha = ((x * x + a) * x + b) % p
 
     # SM2曲线满足p ≡ 3 (mod 4)，因此可以直接使用以下公式计算平方根
-    y = pow(alpha, (p + 1) // 4, p)
+    y = sqrt_mod_p(alpha)
+
+    # y² == alpha 当且仅当 alpha 是二次剩余，此时 (x, y) 必在曲线上，无需再调用 is_on_curve
+    if y * y % p != alpha:
+        raise ValueError("解压缩得到的点不在曲线上")
 
     # 根据前缀调整y的奇偶性
     if (prefix == 2 and y & 1 == 1) or (prefix == 3 and y & 1 == 0):
         y = p - y
 
-    # 验证点是否在曲线上
-    from sm2_ec import is_on_curve
-    point = Point(x, y)
-    if not is_on_curve(point):
-        raise ValueError("解压缩得到的点不在曲线上")
-
-    return point
+    return Point(x, y)
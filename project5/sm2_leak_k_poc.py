@@ -1,8 +1,8 @@
 import random  # 添加random导入
 from sm2_params import n
-from sm2_ec import G, point_multiply, mod_inverse
+from sm2_ec import mod_inverse, fixed_base_mul
 from sm2_keygen import generate_key_pair  # 添加需要的函数
-from sm2_signature import sm3_hash  # 添加sm3_hash导入
+from sm2_signature import sm3_hash_with_z
 
 
 def recover_private_key_from_leaked_k(message, signature, k, Z=None):
@@ -15,14 +15,10 @@ def recover_private_key_from_leaked_k(message, signature, k, Z=None):
 
     返回: 恢复的私钥d
     """
-    if Z is None:
-        Z = b'1234567812345678'
-
     r, s = signature
 
-    # 计算消息摘要 e
-    M = Z + message
-    e = sm3_hash(M)
+    # 计算消息摘要 e = Hash(Z || M)
+    e = sm3_hash_with_z(message, Z)
 
     # 根据SM2签名方程: s = ((1 + d)^-1 * (k - r*d)) mod n
     # 我们可以推导出: (1 + d)*s ≡ k - r*d (mod n)
@@ -55,9 +51,9 @@ def poc_leak_k():
     print(f"使用的随机数 k = {hex(k)}")
 
     # 手动使用已知k进行签名
-    point = point_multiply(k, G)
+    point = fixed_base_mul(k)
     x1 = point.x
-    e = sm3_hash(b'1234567812345678' + message)
+    e = sm3_hash_with_z(message)
     r = (e + x1) % n
     s = (mod_inverse(1 + d, n) * (k - r * d % n) % n) % n
     signature = (r, s)
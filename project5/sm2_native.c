@@ -0,0 +1,319 @@
+/*
+ * SM2 标量乘法的 C 实现，通过 cffi 编译为 _sm2_native 扩展（见 sm2_native_build.py）
+ *
+ * 域元素: 4 个 64 比特字（小端）
+ * 约简:   p = 2^256 - 2^224 - 2^96 + 2^64 - 1，2^256 ≡ 2^224 + 2^96 - 2^64 + 1 (mod p)
+ * 点运算: Jacobian 坐标，倍点利用 a = -3
+ */
+#include <stdint.h>
+#include <string.h>
+
+typedef uint64_t fe[4];
+typedef unsigned __int128 u128;
+
+typedef struct {
+    fe X, Y, Z;
+} jac;
+
+static const fe SM2_P = {
+    0xFFFFFFFFFFFFFFFFULL, 0xFFFFFFFF00000000ULL,
+    0xFFFFFFFFFFFFFFFFULL, 0xFFFFFFFEFFFFFFFFULL
+};
+
+static int fe_is_zero(const fe a)
+{
+    return (a[0] | a[1] | a[2] | a[3]) == 0;
+}
+
+static void fe_copy(fe r, const fe a)
+{
+    memcpy(r, a, sizeof(fe));
+}
+
+/* a >= p */
+static int fe_geq_p(const fe a)
+{
+    for (int i = 3; i >= 0; i--) {
+        if (a[i] != SM2_P[i])
+            return a[i] > SM2_P[i];
+    }
+    return 1;
+}
+
+/* r = a - p（不检查借位） */
+static void fe_sub_p(fe r, const fe a)
+{
+    u128 borrow = 0;
+    for (int i = 0; i < 4; i++) {
+        u128 v = (u128)a[i] - SM2_P[i] - borrow;
+        r[i] = (uint64_t)v;
+        borrow = (v >> 64) & 1;
+    }
+}
+
+static void fe_add(fe r, const fe a, const fe b)
+{
+    u128 carry = 0;
+    fe t;
+    for (int i = 0; i < 4; i++) {
+        carry += (u128)a[i] + b[i];
+        t[i] = (uint64_t)carry;
+        carry >>= 64;
+    }
+    if (carry || fe_geq_p(t))
+        fe_sub_p(t, t);
+    fe_copy(r, t);
+}
+
+static void fe_sub(fe r, const fe a, const fe b)
+{
+    u128 borrow = 0;
+    fe t;
+    for (int i = 0; i < 4; i++) {
+        u128 v = (u128)a[i] - b[i] - borrow;
+        t[i] = (uint64_t)v;
+        borrow = (v >> 64) & 1;
+    }
+    if (borrow) {
+        u128 carry = 0;
+        for (int i = 0; i < 4; i++) {
+            carry += (u128)t[i] + SM2_P[i];
+            t[i] = (uint64_t)carry;
+            carry >>= 64;
+        }
+    }
+    fe_copy(r, t);
+}
+
+/* 约简 512 比特乘积：按 32 比特字把高位折叠到低位，只用加减 */
+static void fe_reduce(fe r, const uint64_t t[8])
+{
+    int64_t c[17];
+    for (int i = 0; i < 8; i++) {
+        c[2 * i] = (int64_t)(t[i] & 0xFFFFFFFFULL);
+        c[2 * i + 1] = (int64_t)(t[i] >> 32);
+    }
+    c[16] = 0;
+
+    for (;;) {
+        for (int i = 15; i >= 8; i--) {
+            int64_t h = c[i];
+            if (h) {
+                int j = i - 8;
+                c[i] = 0;
+                c[j] += h;
+                c[j + 2] -= h;
+                c[j + 3] += h;
+                c[j + 7] += h;
+            }
+        }
+        for (int i = 0; i < 8; i++) {
+            int64_t v = c[i];
+            c[i] = v & 0xFFFFFFFFLL;
+            c[i + 1] += v >> 32;
+        }
+        if (c[8] == 0)
+            break;
+    }
+
+    fe s;
+    for (int i = 0; i < 4; i++)
+        s[i] = (uint64_t)c[2 * i] | ((uint64_t)c[2 * i + 1] << 32);
+    if (fe_geq_p(s))
+        fe_sub_p(s, s);
+    fe_copy(r, s);
+}
+
+static void fe_mul(fe r, const fe a, const fe b)
+{
+    uint64_t t[8] = {0};
+    for (int i = 0; i < 4; i++) {
+        u128 carry = 0;
+        for (int j = 0; j < 4; j++) {
+            carry += (u128)a[i] * b[j] + t[i + j];
+            t[i + j] = (uint64_t)carry;
+            carry >>= 64;
+        }
+        t[i + 4] = (uint64_t)carry;
+    }
+    fe_reduce(r, t);
+}
+
+static void fe_sqr(fe r, const fe a)
+{
+    fe_mul(r, a, a);
+}
+
+static void fe_sqr_n(fe r, const fe a, int n)
+{
+    fe_copy(r, a);
+    for (int i = 0; i < n; i++)
+        fe_sqr(r, r);
+}
+
+/* 费马小定理求逆 a^(p-2)，p-2 = 1{31} 0 1{128} 0{32} 1{62} 0 1 的固定加法链 */
+static void fe_inv(fe r, const fe a)
+{
+    fe x2, x3, x6, x12, x15, x30, x31, x32, x62, x64, x128, t;
+
+    fe_sqr_n(t, a, 1);     fe_mul(x2, t, a);
+    fe_sqr_n(t, x2, 1);    fe_mul(x3, t, a);
+    fe_sqr_n(t, x3, 3);    fe_mul(x6, t, x3);
+    fe_sqr_n(t, x6, 6);    fe_mul(x12, t, x6);
+    fe_sqr_n(t, x12, 3);   fe_mul(x15, t, x3);
+    fe_sqr_n(t, x15, 15);  fe_mul(x30, t, x15);
+    fe_sqr_n(t, x30, 1);   fe_mul(x31, t, a);
+    fe_sqr_n(t, x31, 1);   fe_mul(x32, t, a);
+    fe_sqr_n(t, x31, 31);  fe_mul(x62, t, x31);
+    fe_sqr_n(t, x32, 32);  fe_mul(x64, t, x32);
+    fe_sqr_n(t, x64, 64);  fe_mul(x128, t, x64);
+
+    fe_sqr_n(t, x31, 1 + 128);  fe_mul(t, t, x128);
+    fe_sqr_n(t, t, 32 + 62);    fe_mul(t, t, x62);
+    fe_sqr_n(t, t, 2);          fe_mul(r, t, a);
+}
+
+static void fe_from_bytes(fe r, const unsigned char *in)
+{
+    for (int i = 0; i < 4; i++) {
+        uint64_t w = 0;
+        for (int j = 0; j < 8; j++)
+            w = (w << 8) | in[(3 - i) * 8 + j];
+        r[i] = w;
+    }
+}
+
+static void fe_to_bytes(unsigned char *out, const fe a)
+{
+    for (int i = 0; i < 4; i++) {
+        uint64_t w = a[i];
+        for (int j = 7; j >= 0; j--) {
+            out[(3 - i) * 8 + j] = (unsigned char)w;
+            w >>= 8;
+        }
+    }
+}
+
+/* 倍点：M = 3(X - Z^2)(X + Z^2)，S = 4XY^2 */
+static void ec_jac_double(jac *r, const jac *a)
+{
+    if (fe_is_zero(a->Z) || fe_is_zero(a->Y)) {
+        memset(r->Z, 0, sizeof(fe));
+        return;
+    }
+
+    fe YY, ZZ, S, M, t1, t2, X3, Y3, Z3;
+    fe_sqr(YY, a->Y);
+    fe_sqr(ZZ, a->Z);
+    fe_mul(S, a->X, YY);
+    fe_add(S, S, S);
+    fe_add(S, S, S);
+    fe_sub(t1, a->X, ZZ);
+    fe_add(t2, a->X, ZZ);
+    fe_mul(M, t1, t2);
+    fe_add(t1, M, M);
+    fe_add(M, t1, M);
+
+    fe_sqr(X3, M);
+    fe_add(t1, S, S);
+    fe_sub(X3, X3, t1);
+
+    fe_sqr(t1, YY);
+    fe_add(t1, t1, t1);
+    fe_add(t1, t1, t1);
+    fe_add(t1, t1, t1);
+    fe_sub(t2, S, X3);
+    fe_mul(Y3, M, t2);
+    fe_sub(Y3, Y3, t1);
+
+    fe_mul(Z3, a->Y, a->Z);
+    fe_add(Z3, Z3, Z3);
+
+    fe_copy(r->X, X3);
+    fe_copy(r->Y, Y3);
+    fe_copy(r->Z, Z3);
+}
+
+/* 混合加法：r = a + (x2, y2)，(x2, y2) 为有限仿射点 */
+static void ec_jac_add(jac *r, const jac *a, const fe x2, const fe y2)
+{
+    if (fe_is_zero(a->Z)) {
+        fe_copy(r->X, x2);
+        fe_copy(r->Y, y2);
+        memset(r->Z, 0, sizeof(fe));
+        r->Z[0] = 1;
+        return;
+    }
+
+    fe ZZ, U2, S2, H, R, HH, HHH, V, t, X3, Y3, Z3;
+    fe_sqr(ZZ, a->Z);
+    fe_mul(U2, x2, ZZ);
+    fe_mul(t, ZZ, a->Z);
+    fe_mul(S2, y2, t);
+    fe_sub(H, U2, a->X);
+    fe_sub(R, S2, a->Y);
+
+    if (fe_is_zero(H)) {
+        if (fe_is_zero(R))
+            ec_jac_double(r, a);
+        else
+            memset(r->Z, 0, sizeof(fe));
+        return;
+    }
+
+    fe_sqr(HH, H);
+    fe_mul(HHH, H, HH);
+    fe_mul(V, a->X, HH);
+
+    fe_sqr(X3, R);
+    fe_sub(X3, X3, HHH);
+    fe_add(t, V, V);
+    fe_sub(X3, X3, t);
+
+    fe_sub(t, V, X3);
+    fe_mul(Y3, R, t);
+    fe_mul(t, a->Y, HHH);
+    fe_sub(Y3, Y3, t);
+
+    fe_mul(Z3, a->Z, H);
+
+    fe_copy(r->X, X3);
+    fe_copy(r->Y, Y3);
+    fe_copy(r->Z, Z3);
+}
+
+/*
+ * 计算 k*(px, py)，所有参数均为 32 字节大端编码
+ * 返回 1 表示结果写入 out_x/out_y，返回 0 表示结果为无穷远点
+ */
+int sm2_scalar_mul(const unsigned char *k, const unsigned char *px, const unsigned char *py,
+                   unsigned char *out_x, unsigned char *out_y)
+{
+    fe x, y;
+    jac R;
+
+    fe_from_bytes(x, px);
+    fe_from_bytes(y, py);
+    memset(&R, 0, sizeof(R));
+
+    /* 从高位到低位倍加 */
+    for (int i = 0; i < 256; i++) {
+        int bit = (k[i >> 3] >> (7 - (i & 7))) & 1;
+        ec_jac_double(&R, &R);
+        if (bit)
+            ec_jac_add(&R, &R, x, y);
+    }
+
+    if (fe_is_zero(R.Z))
+        return 0;
+
+    fe zi, zi2, t;
+    fe_inv(zi, R.Z);
+    fe_sqr(zi2, zi);
+    fe_mul(t, R.X, zi2);
+    fe_to_bytes(out_x, t);
+    fe_mul(t, zi2, zi);
+    fe_mul(t, R.Y, t);
+    fe_to_bytes(out_y, t);
+    return 1;
+}
@@ -0,0 +1,19 @@
+# 编译 SM2 标量乘法的 C 扩展 _sm2_native
+# 用法: python sm2_native_build.py（需要 cffi 和 C 编译器），生成的扩展位于本目录
+import os
+from cffi import FFI
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+ffibuilder = FFI()
+ffibuilder.cdef("""
+    int sm2_scalar_mul(const unsigned char *k, const unsigned char *px, const unsigned char *py,
+                       unsigned char *out_x, unsigned char *out_y);
+""")
+
+with open(os.path.join(HERE, "sm2_native.c"), encoding="utf-8") as f:
+    ffibuilder.set_source("_sm2_native", f.read(), extra_compile_args=["-O2"])
+
+
+if __name__ == "__main__":
+    ffibuilder.compile(tmpdir=HERE, verbose=True)
@@ -24,6 +24,9 @@ SM2算法的Python实现优化总结
 
 
 # 以下是一些优化实现示例
+from sm2_params import p
+from sm2_ec import Point, point_add, point_double
+
 
 def window_scalar_multiply(k, P, window_size=4):
     """
@@ -37,13 +40,19 @@ def window_scalar_multiply(k, P, window_size=4):
     for i in range(1, 2 ** window_size):
         precomp.append(point_add(precomp[i - 1], P))
 
-    result = Point.infinity_point()
-    for i in range((k.bit_length() // window_size) + 1, -1, -1):
-        for _ in range(window_size):
-            result = point_double(result)
+    # 一次性把k切分为窗口值（低位在前），避免循环中反复移位整个大整数
+    mask = (1 << window_size) - 1
+    digits = []
+    while k:
+        digits.append(k & mask)
+        k >>= window_size
 
-        # 提取k的当前窗口
-        window_value = (k >> (i * window_size)) & ((1 << window_size) - 1)
+    # 从最高的非零窗口开始，前面不做多余的倍点
+    result = Point.infinity_point()
+    for window_value in reversed(digits):
+        if not result.infinity:
+            for _ in range(window_size):
+                result = point_double(result)
         if window_value > 0:
             result = point_add(result, precomp[window_value])
 
@@ -58,28 +67,27 @@ def naf_scalar_multiply(k, P):
     """
     # 计算k的NAF表示
     naf = []
-    i = 0
     while k > 0:
         if k & 1:  # k是奇数
             # 选择最近的2的幂
-            ki = 2 - (k % 4)
+            ki = 2 - (k & 3)
             naf.append(ki)
             k -= ki
         else:
             naf.append(0)
         k >>= 1
-        i += 1
 
     # 计算-P
     neg_P = Point(P.x, (-P.y) % p)
 
     # 使用NAF进行点乘
     result = Point.infinity_point()
-    for i in range(len(naf) - 1, -1, -1):
-        result = point_double(result)
-        if naf[i] == 1:
+    for digit in reversed(naf):
+        if not result.infinity:
+            result = point_double(result)
+        if digit == 1:
             result = point_add(result, P)
-        elif naf[i] == -1:
+        elif digit == -1:
             result = point_add(result, neg_P)
 
     return result
@@ -5,9 +5,9 @@
 
 import random
 from sm2_params import n
-from sm2_ec import G, point_multiply, mod_inverse
+from sm2_ec import mod_inverse, fixed_base_mul
 from sm2_keygen import generate_key_pair
-from sm2_signature import sm3_hash
+from sm2_signature import sm3_hash_with_z
 
 
 def recover_private_key_from_reused_k_fixed(message1, signature1, message2, signature2, Z=None):
@@ -32,15 +32,12 @@ def recover_private_key_from_reused_k_fixed(message1, signature1, message2, sign
     整理得: d*(1 - (s1-s2)/(r2-r1)) = (s1-s2)/(r2-r1)
     因此: d = (s1-s2)/((r2-r1) - (s1-s2))
     """
-    if Z is None:
-        Z = b'1234567812345678'
-
     r1, s1 = signature1
     r2, s2 = signature2
 
     # 计算两个消息的摘要
-    e1 = sm3_hash(Z + message1)
-    e2 = sm3_hash(Z + message2)
+    e1 = sm3_hash_with_z(message1, Z)
+    e2 = sm3_hash_with_z(message2, Z)
 
     # 验证是否使用了相同的k（通过x1相同来判断）
     # 由于 r1 = (e1 + x1) mod n, r2 = (e2 + x1) mod n
@@ -68,23 +65,23 @@ def generate_signatures_with_same_k(message1, message2, private_key, k, Z=None):
     """
     使用相同的随机数k为两个消息生成签名
     """
-    if Z is None:
-        Z = b'1234567812345678'
-
     # 计算 (x1,y1) = k*G
-    point = point_multiply(k, G)
+    point = fixed_base_mul(k)
     x1 = point.x
 
+    # (1 + d)^-1 只与私钥有关，两次签名共用
+    inv_one_plus_d = mod_inverse(1 + private_key, n)
+
     # 为第一条消息签名
-    e1 = sm3_hash(Z + message1)
+    e1 = sm3_hash_with_z(message1, Z)
     r1 = (e1 + x1) % n
-    s1 = (mod_inverse(1 + private_key, n) * (k - r1 * private_key % n) % n) % n
+    s1 = (inv_one_plus_d * (k - r1 * private_key % n) % n) % n
     signature1 = (r1, s1)
 
     # 为第二条消息签名
-    e2 = sm3_hash(Z + message2)
+    e2 = sm3_hash_with_z(message2, Z)
     r2 = (e2 + x1) % n
-    s2 = (mod_inverse(1 + private_key, n) * (k - r2 * private_key % n) % n) % n
+    s2 = (inv_one_plus_d * (k - r2 * private_key % n) % n) % n
     signature2 = (r2, s2)
 
     return signature1, signature2
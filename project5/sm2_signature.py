@@ -1,35 +1,80 @@
+import functools
 import hashlib
-import random
+import hmac
+from multiprocessing import Pool, cpu_count
 from sm2_params import n
-from sm2_ec import G, point_multiply, point_add, mod_inverse
+from sm2_ec import G, mod_inverse, fixed_base_mul, mul_add, ct_scalar_mul
+
+# 默认用户标识符，以及吸收了它之后的哈希状态（每条消息复制后继续计算）
+DEFAULT_Z = b'1234567812345678'
+_H0 = hashlib.sha256(DEFAULT_Z)
+
+# (1 + d)^-1 mod n 的缓存容量：只保留最近使用的少量私钥，同一签名者多次签名时只需求一次逆
+INV_CACHE_SIZE = 16
 
 
 def sm3_hash(data):
     """使用SM3哈希算法 (此处用SHA-256代替，实际应使用SM3)"""
-    return int(hashlib.sha256(data).hexdigest(), 16)
+    return int.from_bytes(hashlib.sha256(data).digest(), byteorder='big')
+
+
+def sm3_hash_with_z(message, Z=None):
+    """计算 Hash(Z || message)，Z 为空时使用默认用户标识符的预计算哈希状态"""
+    h = _H0.copy() if Z is None else hashlib.sha256(Z)
+    h.update(message)
+    return int.from_bytes(h.digest(), byteorder='big')
+
+
+@functools.lru_cache(maxsize=INV_CACHE_SIZE)
+def _inv_one_plus_d(private_key):
+    """返回 (1 + d)^-1 mod n，按私钥做有界的 LRU 缓存"""
+    return mod_inverse(1 + private_key, n)
+
+
+def deterministic_k(private_key, e):
+    """
+    按 RFC 6979 (HMAC-DRBG, SHA-256) 由私钥和消息摘要确定性地派生随机数 k
+    生成器依次产出 [1, n-1] 内的候选值，签名遇到无效 k 时取下一个候选继续
+    """
+    x = private_key.to_bytes(32, byteorder='big')
+    h1 = (e % n).to_bytes(32, byteorder='big')
+
+    V = b'\x01' * 32
+    K = b'\x00' * 32
+    K = hmac.new(K, V + b'\x00' + x + h1, hashlib.sha256).digest()
+    V = hmac.new(K, V, hashlib.sha256).digest()
+    K = hmac.new(K, V + b'\x01' + x + h1, hashlib.sha256).digest()
+    V = hmac.new(K, V, hashlib.sha256).digest()
+
+    while True:
+        V = hmac.new(K, V, hashlib.sha256).digest()
+        k = int.from_bytes(V, byteorder='big')
+        if 1 <= k < n:
+            yield k
+        K = hmac.new(K, V + b'\x00', hashlib.sha256).digest()
+        V = hmac.new(K, V, hashlib.sha256).digest()
 
 
-def sign(message, private_key, Z=None):
+def sign(message, private_key, Z=None, fast=False):
     """
     SM2签名算法
     message: 待签名消息（字节串）
     private_key: 私钥d
     Z: 用户身份标识符（可选），如果未提供则使用默认值
+    fast: 为 True 时用基点 comb 预计算表计算 k*G（更快，但查表位置依赖秘密随机数 k 的比特，存在计时侧信道）；
+          默认用 Montgomery 阶梯
     """
-    if Z is None:
-        # 默认用户标识符
-        Z = b'1234567812345678'
-
-    # 1. 计算消息摘要
-    M = Z + message
-    e = sm3_hash(M)
+    # 1. 计算消息摘要 e = Hash(Z || M)
+    e = sm3_hash_with_z(message, Z)
+    inv_one_plus_d = _inv_one_plus_d(private_key)
+    k_candidates = deterministic_k(private_key, e)
 
     while True:
-        # 2. 生成随机数 k∈[1,n-1]
-        k = random.randint(1, n - 1)
+        # 2. 按 RFC 6979 派生随机数 k∈[1,n-1]，重试时取下一个候选值
+        k = next(k_candidates)
 
         # 3. 计算 (x1,y1) = k*G
-        point = point_multiply(k, G)
+        point = fixed_base_mul(k) if fast else ct_scalar_mul(k, G)
         x1 = point.x
 
         # 4. 计算 r = (e + x1) mod n
@@ -38,7 +83,7 @@ def sign(message, private_key, Z=None):
             continue  # 如果r=0或r+k=n，则返回步骤2重新生成随机数k
 
         # 5. 计算 s = ((1 + d)^-1 * (k - r*d)) mod n
-        s = (mod_inverse(1 + private_key, n) * (k - r * private_key % n) % n) % n
+        s = (inv_one_plus_d * (k - r * private_key % n) % n) % n
         if s == 0:
             continue  # 如果s=0，则返回步骤2重新生成随机数k
 
@@ -59,23 +104,18 @@ def verify(message, signature, public_key, Z=None):
     if r < 1 or r > n - 1 or s < 1 or s > n - 1:
         return False
 
-    if Z is None:
-        # 默认用户标识符
-        Z = b'1234567812345678'
-
-    # 1. 计算消息摘要
-    M = Z + message
-    e = sm3_hash(M)
+    # 1. 计算消息摘要 e = Hash(Z || M)
+    e = sm3_hash_with_z(message, Z)
 
     # 2. 计算 t = (r + s) mod n
     t = (r + s) % n
     if t == 0:
         return False
 
-    # 3. 计算 (x1',y1') = s*G + t*P
-    P1 = point_multiply(s, G)
-    P2 = point_multiply(t, public_key)
-    point = point_add(P1, P2)
+    # 3. 计算 (x1',y1') = s*G + t*P，两次标量乘法共用一条倍点链
+    point = mul_add(s, G, t, public_key)
+    if point.infinity:
+        return False
     x1 = point.x
 
     # 4. 计算 R = (e + x1') mod n
@@ -83,3 +123,27 @@ def verify(message, signature, public_key, Z=None):
 
     # 5. 验证 R == r
     return R == r
+
+
+def _verify_one(item):
+    """进程池工作函数：item 为 (message, signature, public_key) 或 (message, signature, public_key, Z)"""
+    return verify(*item)
+
+
+def verify_batch(items, processes=None):
+    """
+    批量验签，各签名相互独立，分发到多个进程并行验证
+    items: (message, signature, public_key[, Z]) 组成的序列
+    processes: 进程数，默认使用全部 CPU 核；为 1 或只有一个签名时在当前进程中顺序验证
+    返回: 与 items 一一对应的验证结果列表
+    """
+    items = list(items)
+    if processes is None:
+        processes = cpu_count()
+    processes = min(processes, len(items))
+
+    if processes <= 1:
+        return [_verify_one(item) for item in items]
+
+    with Pool(processes) as pool:
+        return pool.map(_verify_one, items, chunksize=max(1, len(items) // (4 * processes)))
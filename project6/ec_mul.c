@@ -0,0 +1,240 @@
+/*
+ * 短 Weierstrass 曲线 y^2 = x^3 + ax + b 上的标量乘法，基于 GMP，
+ * 通过 cffi 编译为 _ec_mul 扩展（见 ec_mul_build.py）
+ *
+ * 点运算: Jacobian 坐标 (X, Y, Z) 表示仿射点 (X/Z^2, Y/Z^3)，Z = 0 为无穷远点
+ * 标量乘: Montgomery 阶梯，标量先变换为 k + n 或 k + 2n 使最高位固定，
+ *         循环次数只取决于 n，每个比特固定执行一次点加和一次倍点，最后只求一次逆
+ *
+ * 注意: GMP 的 mpz 运算本身不是常数时间的，阶梯只保证运算序列与标量无关
+ */
+#include <stddef.h>
+#include <string.h>
+#include <gmp.h>
+
+typedef struct {
+    mpz_t X, Y, Z;
+} jac;
+
+typedef struct {
+    mpz_t p, a;
+    mpz_t t1, t2, t3, t4, t5, t6, t7;
+} curve_ctx;
+
+static void jac_init(jac *P)
+{
+    mpz_inits(P->X, P->Y, P->Z, NULL);
+}
+
+static void jac_clear(jac *P)
+{
+    mpz_clears(P->X, P->Y, P->Z, NULL);
+}
+
+static void jac_set(jac *R, const jac *P)
+{
+    mpz_set(R->X, P->X);
+    mpz_set(R->Y, P->Y);
+    mpz_set(R->Z, P->Z);
+}
+
+static void jac_swap(jac *P, jac *Q)
+{
+    mpz_swap(P->X, Q->X);
+    mpz_swap(P->Y, Q->Y);
+    mpz_swap(P->Z, Q->Z);
+}
+
+/* R = 2P：S = 4XY^2，M = 3X^2 + aZ^4 */
+static void jac_double(curve_ctx *c, jac *R, const jac *P)
+{
+    if (mpz_sgn(P->Z) == 0 || mpz_sgn(P->Y) == 0) {
+        mpz_set_ui(R->Z, 0);
+        return;
+    }
+
+    mpz_t *YY = &c->t1, *S = &c->t2, *M = &c->t3, *ZZ = &c->t4, *t = &c->t5;
+
+    mpz_mul(*YY, P->Y, P->Y);
+    mpz_mod(*YY, *YY, c->p);
+    mpz_mul(*S, P->X, *YY);
+    mpz_mul_2exp(*S, *S, 2);
+    mpz_mod(*S, *S, c->p);
+
+    mpz_mul(*ZZ, P->Z, P->Z);
+    mpz_mod(*ZZ, *ZZ, c->p);
+    mpz_mul(*t, *ZZ, *ZZ);
+    mpz_mod(*t, *t, c->p);
+    mpz_mul(*t, *t, c->a);
+    mpz_mul(*M, P->X, P->X);
+    mpz_mul_ui(*M, *M, 3);
+    mpz_add(*M, *M, *t);
+    mpz_mod(*M, *M, c->p);
+
+    /* Z3 = 2YZ，先算出以允许 R 与 P 为同一个点 */
+    mpz_mul(R->Z, P->Y, P->Z);
+    mpz_mul_2exp(R->Z, R->Z, 1);
+    mpz_mod(R->Z, R->Z, c->p);
+
+    /* X3 = M^2 - 2S */
+    mpz_mul(R->X, *M, *M);
+    mpz_submul_ui(R->X, *S, 2);
+    mpz_mod(R->X, R->X, c->p);
+
+    /* Y3 = M(S - X3) - 8Y^4 */
+    mpz_mul(*t, *YY, *YY);
+    mpz_mul_2exp(*t, *t, 3);
+    mpz_sub(*S, *S, R->X);
+    mpz_mul(R->Y, *M, *S);
+    mpz_sub(R->Y, R->Y, *t);
+    mpz_mod(R->Y, R->Y, c->p);
+}
+
+/* R = P + Q，R 可以与 P 或 Q 为同一个点 */
+static void jac_add(curve_ctx *c, jac *R, const jac *P, const jac *Q)
+{
+    if (mpz_sgn(P->Z) == 0) {
+        jac_set(R, Q);
+        return;
+    }
+    if (mpz_sgn(Q->Z) == 0) {
+        jac_set(R, P);
+        return;
+    }
+
+    mpz_t *U1 = &c->t1, *S1 = &c->t2, *H = &c->t3, *r = &c->t4;
+    mpz_t *HH = &c->t5, *HHH = &c->t6, *t = &c->t7;
+
+    /* U1 = X1 Z2^2，S1 = Y1 Z2^3 */
+    mpz_mul(*t, Q->Z, Q->Z);
+    mpz_mod(*t, *t, c->p);
+    mpz_mul(*U1, P->X, *t);
+    mpz_mod(*U1, *U1, c->p);
+    mpz_mul(*t, *t, Q->Z);
+    mpz_mul(*S1, P->Y, *t);
+    mpz_mod(*S1, *S1, c->p);
+
+    /* H = X2 Z1^2 - U1，r = Y2 Z1^3 - S1 */
+    mpz_mul(*t, P->Z, P->Z);
+    mpz_mod(*t, *t, c->p);
+    mpz_mul(*H, Q->X, *t);
+    mpz_sub(*H, *H, *U1);
+    mpz_mod(*H, *H, c->p);
+    mpz_mul(*t, *t, P->Z);
+    mpz_mul(*r, Q->Y, *t);
+    mpz_sub(*r, *r, *S1);
+    mpz_mod(*r, *r, c->p);
+
+    if (mpz_sgn(*H) == 0) {
+        if (mpz_sgn(*r) == 0)
+            jac_double(c, R, P);
+        else
+            mpz_set_ui(R->Z, 0);
+        return;
+    }
+
+    mpz_mul(*HH, *H, *H);
+    mpz_mod(*HH, *HH, c->p);
+    mpz_mul(*HHH, *HH, *H);
+    mpz_mod(*HHH, *HHH, c->p);
+
+    /* Z3 = Z1 Z2 H */
+    mpz_mul(R->Z, P->Z, Q->Z);
+    mpz_mod(R->Z, R->Z, c->p);
+    mpz_mul(R->Z, R->Z, *H);
+    mpz_mod(R->Z, R->Z, c->p);
+
+    /* X3 = r^2 - H^3 - 2 U1 H^2 */
+    mpz_mul(*U1, *U1, *HH);
+    mpz_mod(*U1, *U1, c->p);
+    mpz_mul(R->X, *r, *r);
+    mpz_sub(R->X, R->X, *HHH);
+    mpz_submul_ui(R->X, *U1, 2);
+    mpz_mod(R->X, R->X, c->p);
+
+    /* Y3 = r (U1 H^2 - X3) - S1 H^3 */
+    mpz_sub(*U1, *U1, R->X);
+    mpz_mul(R->Y, *r, *U1);
+    mpz_submul(R->Y, *S1, *HHH);
+    mpz_mod(R->Y, R->Y, c->p);
+}
+
+static void export_fixed(unsigned char *out, size_t len, const mpz_t v)
+{
+    size_t count = (mpz_sizeinbase(v, 2) + 7) / 8;
+    memset(out, 0, len);
+    if (mpz_sgn(v) != 0)
+        mpz_export(out + len - count, NULL, 1, 1, 1, 0, v);
+}
+
+/*
+ * 计算 k*(px, py)，(px, py) 必须是阶为 n 的有限点
+ * k、n 为 klen 字节的大端编码，px、py、p、a 为 len 字节的大端编码，p、a 为曲线参数
+ * 返回 1 表示结果写入 out_x/out_y，返回 0 表示结果为无穷远点
+ */
+int ec_scalar_mul(const unsigned char *k, const unsigned char *n, size_t klen,
+                  const unsigned char *px, const unsigned char *py,
+                  const unsigned char *p, const unsigned char *a, size_t len,
+                  unsigned char *out_x, unsigned char *out_y)
+{
+    curve_ctx c;
+    jac R0, R1;
+    mpz_t k1, order, zi, zi2;
+    size_t bits;
+    int ok;
+
+    mpz_inits(c.p, c.a, c.t1, c.t2, c.t3, c.t4, c.t5, c.t6, c.t7, k1, order, zi, zi2, NULL);
+    jac_init(&R0);
+    jac_init(&R1);
+
+    mpz_import(c.p, len, 1, 1, 1, 0, p);
+    mpz_import(c.a, len, 1, 1, 1, 0, a);
+    mpz_import(order, klen, 1, 1, 1, 0, n);
+    mpz_import(k1, klen, 1, 1, 1, 0, k);
+    mpz_mod(k1, k1, order);
+
+    ok = mpz_sgn(k1) != 0;
+    if (ok) {
+        /* k1 = k + n，不足 bits + 1 个比特时再加一个 n，使最高位（第 bits 位）固定为 1 */
+        bits = mpz_sizeinbase(order, 2);
+        mpz_add(k1, k1, order);
+        if (mpz_sizeinbase(k1, 2) <= bits)
+            mpz_add(k1, k1, order);
+
+        /* 最高位已知为 1：R0 = P，R1 = 2P，其余 bits 个比特逐位处理 */
+        mpz_import(R0.X, len, 1, 1, 1, 0, px);
+        mpz_import(R0.Y, len, 1, 1, 1, 0, py);
+        mpz_set_ui(R0.Z, 1);
+        jac_double(&c, &R1, &R0);
+
+        /* 不变量 R1 - R0 = P；比特为 1 时交换后计算，使两个分支执行相同的运算 */
+        for (size_t i = bits; i-- > 0;) {
+            int bit = mpz_tstbit(k1, i);
+            if (bit)
+                jac_swap(&R0, &R1);
+            jac_add(&c, &R1, &R0, &R1);
+            jac_double(&c, &R0, &R0);
+            if (bit)
+                jac_swap(&R0, &R1);
+        }
+
+        ok = mpz_sgn(R0.Z) != 0;
+    }
+    if (ok) {
+        mpz_invert(zi, R0.Z, c.p);
+        mpz_mul(zi2, zi, zi);
+        mpz_mod(zi2, zi2, c.p);
+        mpz_mul(R0.X, R0.X, zi2);
+        mpz_mod(R0.X, R0.X, c.p);
+        mpz_mul(zi2, zi2, zi);
+        mpz_mul(R0.Y, R0.Y, zi2);
+        mpz_mod(R0.Y, R0.Y, c.p);
+        export_fixed(out_x, len, R0.X);
+        export_fixed(out_y, len, R0.Y);
+    }
+
+    jac_clear(&R0);
+    jac_clear(&R1);
+    mpz_clears(c.p, c.a, c.t1, c.t2, c.t3, c.t4, c.t5, c.t6, c.t7, k1, order, zi, zi2, NULL);
+    return ok;
+}
@@ -0,0 +1,21 @@
+# 编译椭圆曲线标量乘法的 C 扩展 _ec_mul
+# 用法: python ec_mul_build.py（需要 cffi、C 编译器和 GMP 开发库），生成的扩展位于本目录
+import os
+from cffi import FFI
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+ffibuilder = FFI()
+ffibuilder.cdef("""
+    int ec_scalar_mul(const unsigned char *k, const unsigned char *n, size_t klen,
+                      const unsigned char *px, const unsigned char *py,
+                      const unsigned char *p, const unsigned char *a, size_t len,
+                      unsigned char *out_x, unsigned char *out_y);
+""")
+
+with open(os.path.join(HERE, "ec_mul.c"), encoding="utf-8") as f:
+    ffibuilder.set_source("_ec_mul", f.read(), libraries=["gmp"], extra_compile_args=["-O2"])
+
+
+if __name__ == "__main__":
+    ffibuilder.compile(tmpdir=HERE, verbose=True)
@@ -9,16 +9,43 @@ Author: Improved Implementation
 Date: 2024
 """
 
+import functools
 import hashlib
+import hmac
+import json
 import logging
 import os
 import secrets
+from concurrent.futures import ProcessPoolExecutor
 from dataclasses import dataclass
-from typing import Set, List, Tuple, Optional, Union
+from typing import Set, List, Tuple, Optional, Union, Iterator
 from enum import Enum
 
+import numpy as np
 from tinyec import registry
-from tinyec.ec import Point
+from tinyec.ec import Point, Inf
+
+# 可选依赖：fastecdsa 的标量乘法由原生代码实现，未安装时退回 tinyec 的纯 Python 实现
+try:
+    from fastecdsa.curve import P256 as _FAST_P256
+    from fastecdsa.point import Point as _FastPoint
+    FASTECDSA_AVAILABLE = True
+except ImportError:
+    FASTECDSA_AVAILABLE = False
+
+# 可选后端：cffi 编译的 C 扩展 _ec_mul（由 ec_mul_build.py 生成），基于 GMP 的 Jacobian 坐标 Montgomery 阶梯
+try:
+    from _ec_mul import ffi as _native_ffi, lib as _native_lib
+    NATIVE_AVAILABLE = True
+except ImportError:
+    NATIVE_AVAILABLE = False
+
+# 可选依赖：gmpy2 的模逆和模幂基于 GMP，比 Python 内置的 pow 快数倍到一个数量级
+try:
+    import gmpy2
+    GMPY2_AVAILABLE = True
+except ImportError:
+    GMPY2_AVAILABLE = False
 
 
 # ==================== 配置和常量 ====================
@@ -29,8 +56,12 @@ class Config:
     CURVE_NAME: str = 'secp256r1'
     PREFIX_LENGTH_BYTES: int = 4
     HASH_ALGORITHM: str = 'sha256'
-    MAX_HASH_TO_CURVE_ATTEMPTS: int = 1000
+    HASH_TO_CURVE_DST: bytes = b'PasswordCheckup-V01-CS01-with-P256_XMD:SHA-256_SSWU_RO_'
     DEFAULT_RANDOM_BYTES: int = 32
+    PARALLEL_MIN_CREDENTIALS: int = 2048  # 泄露凭据达到该数量时用进程池并行预处理
+    MAX_WORKERS: Optional[int] = None  # 进程池大小，默认为 CPU 核数
+    PARALLEL_CHUNKSIZE: int = 1024
+    CACHE_KEY_ENV: str = 'PASSWORD_CHECKUP_CACHE_KEY'  # 未显式传入缓存密钥时从该环境变量读取
 
 
 class LogLevel(Enum):
@@ -87,6 +118,136 @@ def validate_input(username: str, password: str) -> None:
         raise InvalidInputError("密码过长")
 
 
+# 曲线对象按名称缓存，所有 CryptographicOperations 实例共享，避免重复解析曲线参数
+_CURVE_CACHE = {}
+
+
+def _get_curve(name: str):
+    """获取曲线对象（带缓存）"""
+    curve = _CURVE_CACHE.get(name)
+    if curve is None:
+        curve = registry.get_curve(name)
+        _CURVE_CACHE[name] = curve
+    return curve
+
+
+def _hash_constructor(name: str):
+    """返回哈希算法的构造函数，常用算法直接绑定 hashlib.sha256 等，省去 hashlib.new 的按名查找"""
+    constructor = getattr(hashlib, name, None)
+    if constructor is None or name not in hashlib.algorithms_guaranteed:
+        constructor = functools.partial(hashlib.new, name)
+    return constructor
+
+
+# RFC 9380 Simplified SWU 映射所用的非平方常数 Z（RFC 9380 第 8.2 节）
+_SSWU_Z = {'secp256r1': -10}
+
+
+def expand_message_xmd(msg: bytes, dst: bytes, len_in_bytes: int, hash_fn, z_pad_state=None) -> bytes:
+    """
+    RFC 9380 第 5.3.1 节的 expand_message_xmd
+
+    Args:
+        msg: 消息
+        dst: 域分隔标签
+        len_in_bytes: 输出长度
+        hash_fn: 哈希构造函数
+        z_pad_state: 可选，已吸收 Z_pad（一个分组长度的零字节）的哈希状态，调用方缓存后每次复制即可
+    """
+    if z_pad_state is None:
+        z_pad_state = hash_fn()
+        z_pad_state.update(bytes(z_pad_state.block_size))
+    b_in_bytes = z_pad_state.digest_size
+    ell = (len_in_bytes + b_in_bytes - 1) // b_in_bytes
+    if ell > 255 or len_in_bytes > 65535 or len(dst) > 255:
+        raise HashToCurveError("expand_message_xmd 参数超出范围")
+
+    dst_prime = dst + bytes([len(dst)])
+    h = z_pad_state.copy()
+    h.update(msg + len_in_bytes.to_bytes(2, 'big') + b'\x00' + dst_prime)
+    b_0 = h.digest()
+    b_i = hash_fn(b_0 + b'\x01' + dst_prime).digest()
+    uniform_bytes = [b_i]
+    for i in range(2, ell + 1):
+        b_i = hash_fn(bytes(x ^ y for x, y in zip(b_0, b_i)) + bytes([i]) + dst_prime).digest()
+        uniform_bytes.append(b_i)
+    return b''.join(uniform_bytes)[:len_in_bytes]
+
+
+def _mod_inverse(x: int, m: int) -> int:
+    """计算 x 模 m 的逆元，优先使用 gmpy2"""
+    if GMPY2_AVAILABLE:
+        return int(gmpy2.invert(x, m))
+    return pow(x, -1, m)
+
+
+def _mod_pow(x: int, e: int, m: int) -> int:
+    """计算 x^e mod m，优先使用 gmpy2（GMP 的 mpz_powm）"""
+    if GMPY2_AVAILABLE:
+        return int(gmpy2.powmod(x, e, m))
+    return pow(x, e, m)
+
+
+# 纯 Python 标量乘法所用 wNAF 的窗口宽度：非零数字为 ±1, ±3, ..., ±15，平均每 6 比特一个
+WNAF_WIDTH = 5
+
+
+def to_wnaf(k: int, w: int = WNAF_WIDTH) -> List[int]:
+    """
+    计算非负整数 k 的宽度为 w 的 NAF 表示
+
+    Returns:
+        从低位到高位排列的数字列表，非零数字均为奇数且绝对值小于 2^(w-1)
+    """
+    digits = []
+    full = 1 << w
+    half = full >> 1
+    while k:
+        if k & 1:
+            d = k & (full - 1)
+            if d >= half:
+                d -= full
+            k -= d
+        else:
+            d = 0
+        digits.append(d)
+        k >>= 1
+    return digits
+
+
+def _cswap(bit: int, A: Tuple[int, int, int], B: Tuple[int, int, int]) -> Tuple[Tuple[int, int, int], Tuple[int, int, int]]:
+    """bit 为 1 时交换 A、B 两个 Jacobian 元组，用掩码运算代替条件分支"""
+    mask = -bit
+    swapped_a = []
+    swapped_b = []
+    for a_i, b_i in zip(A, B):
+        d = (a_i ^ b_i) & mask
+        swapped_a.append(a_i ^ d)
+        swapped_b.append(b_i ^ d)
+    return tuple(swapped_a), tuple(swapped_b)
+
+
+def sorted_blob_contains(blob: bytes, item: bytes) -> bool:
+    """
+    在定长记录首尾相接、按字节序升序排列的字节串中二分查找 item
+
+    blob 以零拷贝的定长字节串数组视图交给 numpy 的 searchsorted 在 C 层完成二分，
+    不需要像集合那样为每条记录构造 Python 对象
+
+    Args:
+        blob: 记录拼接而成的字节串，每条记录长度均为 len(item)
+        item: 待查找的记录
+
+    Returns:
+        True 如果 item 是 blob 中的某条记录
+    """
+    width = len(item)
+    records = np.frombuffer(blob, dtype=f'S{width}')
+    i = int(records.searchsorted(item))
+    # numpy 取出的定长字节串会去掉末尾的 0 字节，因此直接比较原始字节
+    return blob[i * width:(i + 1) * width] == item
+
+
 def secure_random_int(max_value: int) -> int:
     """生成安全的随机整数"""
     if max_value <= 0:
@@ -99,10 +260,43 @@ def secure_random_int(max_value: int) -> int:
 class CryptographicOperations:
     """密码学操作类"""
 
+    logger = logging.getLogger(f"{__name__}.CryptographicOperations")
+
     def __init__(self, config: Config):
         self.config = config
-        self.curve = registry.get_curve(config.CURVE_NAME)
-        self.logger = logging.getLogger(f"{__name__}.{self.__class__.__name__}")
+        self.curve = _get_curve(config.CURVE_NAME)
+        self._hash = _hash_constructor(config.HASH_ALGORITHM)
+
+        # 缓存曲线参数，热点路径中不再逐级访问 self.curve.field.p 等属性
+        self._p = self.curve.field.p
+        self._n = self.curve.field.n
+        self._a = self.curve.a
+        self._b = self.curve.b
+        # 坐标是域元素，定长编码的字节数由 p 决定（阶 n 的长度可能与 p 不同）；secp256r1 固定为 32 字节
+        self._coord_size = (self._p.bit_length() + 7) // 8
+        assert config.CURVE_NAME != 'secp256r1' or self._coord_size == 32
+        self._native_p = self._p.to_bytes(self._coord_size, 'big')
+        self._native_a = (self._a % self._p).to_bytes(self._coord_size, 'big')
+        self._scalar_size = (self._n.bit_length() + 7) // 8
+        self._native_n = self._n.to_bytes(self._scalar_size, 'big')
+        self._sqrt_exp = (self._p + 1) // 4
+
+        # hash-to-curve (RFC 9380) 参数：每个域元素取 L = ceil((ceil(log2(p)) + 128) / 8) 字节
+        self._h2c_field_len = (self._p.bit_length() + 128 + 7) // 8
+        self._h2c_z_pad_state = self._hash()
+        self._h2c_z_pad_state.update(bytes(self._h2c_z_pad_state.block_size))
+        self._sswu_z = _SSWU_Z.get(config.CURVE_NAME)
+        if self._sswu_z is not None:
+            p = self._p
+            self._sswu_minus_b_over_a = -self._b * pow(self._a, -1, p) % p
+            self._sswu_b_over_za = self._b * pow(self._sswu_z * self._a, -1, p) % p
+            # c = sqrt(-Z^3)：gx1 不是平方数时 sqrt(gx2) = c * u^3 * sqrt(-gx1)
+            minus_z3 = -self._sswu_z ** 3 % p
+            self._sswu_c = pow(minus_z3, self._sqrt_exp, p)
+            assert self._sswu_c * self._sswu_c % p == minus_z3
+
+        # fastecdsa 目前只接入 secp256r1
+        self._fast_curve = _FAST_P256 if FASTECDSA_AVAILABLE and config.CURVE_NAME == 'secp256r1' else None
 
     def h1(self, username: str, password: str) -> bytes:
         """
@@ -115,25 +309,21 @@ class CryptographicOperations:
         Returns:
             哈希结果
         """
-        try:
-            validate_input(username, password)
-
-            username_bytes = username.encode('utf-8')
-            password_bytes = password.encode('utf-8')
-
-            hasher = hashlib.new(self.config.HASH_ALGORITHM)
-            hasher.update(b"username:" + username_bytes)
-            hasher.update(b"password:" + password_bytes)
-
-            return hasher.digest()
+        validate_input(username, password)
 
-        except Exception as e:
-            raise CryptographicError(f"H1哈希计算失败: {e}")
+        hasher = self._hash()
+        hasher.update(b"username:" + username.encode('utf-8'))
+        hasher.update(b"password:" + password.encode('utf-8'))
+        return hasher.digest()
 
     def h2_hash_to_curve(self, data: bytes) -> Point:
         """
         哈希函数 H2: 将字节串映射到椭圆曲线上的点
 
+        按 RFC 9380 的 hash_to_curve（secp256r1 对应 P256_XMD:SHA-256_SSWU_RO_）实现：
+        hash_to_field 得到两个域元素，分别经 Simplified SWU 映射到曲线后相加，
+        secp256r1 的余因子为 1，无需清除余因子。计算量固定，不再需要反复尝试
+
         Args:
             data: 待映射的数据
 
@@ -141,87 +331,356 @@ class CryptographicOperations:
             椭圆曲线上的点
 
         Raises:
-            HashToCurveError: 当无法找到有效点时
+            HashToCurveError: 当前曲线不支持或映射结果无效时
         """
         if not isinstance(data, bytes):
             raise InvalidInputError("输入数据必须是字节类型")
-
-        attempts = 0
-        working_data = data
-
-        while attempts < self.config.MAX_HASH_TO_CURVE_ATTEMPTS:
-            try:
-                # 生成候选的 x 坐标
-                x_bytes = hashlib.new(self.config.HASH_ALGORITHM, working_data).digest()
-                x = int.from_bytes(x_bytes, 'big') % self.curve.field.p
-
-                # 计算椭圆曲线方程右边: y^2 = x^3 + ax + b (mod p)
-                y_squared = (pow(x, 3, self.curve.field.p) +
-                             self.curve.a * x + self.curve.b) % self.curve.field.p
-
-                # 检查是否为二次剩余
-                if pow(y_squared, (self.curve.field.p - 1) // 2, self.curve.field.p) == 1:
-                    # 计算平方根（适用于 p ≡ 3 (mod 4)）
-                    y = pow(y_squared, (self.curve.field.p + 1) // 4, self.curve.field.p)
-
-                    # 验证点是否在曲线上
-                    point = Point(self.curve, x, y)
-                    if self._is_valid_point(point):
-                        self.logger.debug(f"Hash-to-curve 成功，尝试次数: {attempts + 1}")
-                        return point
-
-                # 如果失败，修改输入数据重试
-                working_data += bytes([attempts % 256])
-                attempts += 1
-
-            except Exception as e:
-                self.logger.warning(f"Hash-to-curve 尝试 {attempts + 1} 失败: {e}")
-                working_data += bytes([attempts % 256])
-                attempts += 1
-
-        raise HashToCurveError(f"在 {self.config.MAX_HASH_TO_CURVE_ATTEMPTS} 次尝试后无法生成有效点")
+        if self._sswu_z is None:
+            raise HashToCurveError(f"曲线 {self.config.CURVE_NAME} 不支持 Simplified SWU 映射")
+
+        p = self._p
+        u0, u1 = self._hash_to_field(data, 2)
+        x0, y0 = self._map_to_curve_sswu(u0)
+        x1, y1 = self._map_to_curve_sswu(u1)
+
+        # 两个映射点直接按仿射公式相加，只构造一次 Point 对象
+        if x0 == x1:
+            if (y0 + y1) % p == 0:
+                raise HashToCurveError("Hash-to-curve 得到无穷远点")
+            m = (3 * x0 * x0 + self._a) * _mod_inverse(2 * y0, p) % p
+        else:
+            m = (y1 - y0) * _mod_inverse(x1 - x0, p) % p
+        x = (m * m - x0 - x1) % p
+        y = (m * (x0 - x) - y0) % p
+        point = Point(self.curve, x, y)
+
+        # SSWU 映射的结果按构造必在曲线上，仅在调试时复核
+        assert self._is_valid_point(point)
+        return point
+
+    def _hash_to_field(self, data: bytes, count: int) -> List[int]:
+        """RFC 9380 第 5.2 节的 hash_to_field（扩展次数 m = 1）"""
+        L, p = self._h2c_field_len, self._p
+        uniform_bytes = expand_message_xmd(data, self.config.HASH_TO_CURVE_DST, count * L,
+                                           self._hash, self._h2c_z_pad_state)
+        return [int.from_bytes(uniform_bytes[i * L:(i + 1) * L], 'big') % p
+                for i in range(count)]
+
+    def _map_to_curve_sswu(self, u: int) -> Tuple[int, int]:
+        """RFC 9380 第 6.6.2 节的 Simplified SWU 映射（要求 a、b 均非零），返回仿射坐标"""
+        p, a, b, Z = self._p, self._a, self._b, self._sswu_z
+
+        # tv1 = inv0(Z^2 * u^4 + Z * u^2)
+        zu2 = Z * u * u % p
+        tv1 = (zu2 * zu2 + zu2) % p
+        if tv1 == 0:
+            x1 = self._sswu_b_over_za
+        else:
+            x1 = self._sswu_minus_b_over_a * (1 + _mod_inverse(tv1, p)) % p
+        gx1 = ((x1 * x1 + a) * x1 + b) % p
+
+        # p ≡ 3 (mod 4)：先求候选平方根，平方后验证即可判断 gx1 是否为平方数，省去单独的 Legendre 符号运算
+        y1 = _mod_pow(gx1, self._sqrt_exp, p)
+        if y1 * y1 % p == gx1:
+            x, y = x1, y1
+        else:
+            # gx1 不是平方数时 y1^2 = -gx1，而 g(x2) = Z^3 * u^6 * gx1，
+            # 因此取 x2 = Z * u^2 * x1，y2 = sqrt(-Z^3) * u^3 * y1，无需再做一次幂运算
+            x = zu2 * x1 % p
+            y = self._sswu_c * u * u * u % p * y1 % p
+
+        # 令 sgn0(y) = sgn0(u)
+        if (u & 1) != (y & 1):
+            y = p - y
+        return x, y
 
     def _is_valid_point(self, point: Point) -> bool:
         """验证点是否在椭圆曲线上"""
         try:
+            p = self._p
             x, y = point.x, point.y
-            left = (y * y) % self.curve.field.p
-            right = (pow(x, 3, self.curve.field.p) +
-                     self.curve.a * x + self.curve.b) % self.curve.field.p
-            return left == right
-        except:
+            # x^3 + ax + b 按 Horner 形式计算，两次模乘代替一次 pow
+            return (y * y - ((x * x % p + self._a) * x + self._b)) % p == 0
+        except (AttributeError, TypeError):
             return False
 
+    def scalar_mult(self, k: int, point: Point, k_wnaf: Optional[List[int]] = None,
+                    constant_time: bool = False) -> Point:
+        """
+        标量乘法 k * point
+
+        依次尝试 fastecdsa、C 扩展 _ec_mul（两者都用 Montgomery 阶梯），都不可用时使用纯 Python 实现
+
+        Args:
+            k: 标量
+            point: 椭圆曲线上的点
+            k_wnaf: 可选，预先计算好的 to_wnaf(k % n)，同一标量反复使用时可省去重新编码
+            constant_time: 为 True 时纯 Python 实现改用循环次数固定的 Montgomery 阶梯（较慢）；
+                           用于在线请求中涉及秘密标量的运算
+        """
+        if self._fast_curve is not None:
+            # fastecdsa 的无穷远点没有可用的仿射坐标，与其他实现一样返回 Inf；P-256 余因子为 1，k ≡ 0 (mod n) 时结果即为无穷远点
+            k %= self._n
+            if not k or isinstance(point, Inf):
+                return Inf(self.curve)
+            result = k * _FastPoint(point.x, point.y, curve=self._fast_curve)
+            return Point(self.curve, result.x, result.y)
+        if NATIVE_AVAILABLE:
+            return self._native_scalar_mult(k, point)
+        if constant_time:
+            return self._ladder_mul(k, point)
+        if k_wnaf is None:
+            k_wnaf = to_wnaf(k % self._n)
+        return self._wnaf_scalar_mult(point, k_wnaf)
+
+    def _native_scalar_mult(self, k: int, point: Point) -> Point:
+        """调用 C 扩展计算 k * point，整个阶梯在 Jacobian 坐标下完成，只在最后求一次逆"""
+        if isinstance(point, Inf):
+            return Inf(self.curve)
+        size = self._coord_size
+        out_x = _native_ffi.new("unsigned char[]", size)
+        out_y = _native_ffi.new("unsigned char[]", size)
+        if not _native_lib.ec_scalar_mul((k % self._n).to_bytes(self._scalar_size, 'big'),
+                                         self._native_n, self._scalar_size,
+                                         point.x.to_bytes(size, 'big'), point.y.to_bytes(size, 'big'),
+                                         self._native_p, self._native_a, size, out_x, out_y):
+            return Inf(self.curve)
+        return Point(self.curve,
+                     int.from_bytes(_native_ffi.buffer(out_x), 'big'),
+                     int.from_bytes(_native_ffi.buffer(out_y), 'big'))
+
+    def prf_to_bytes(self, point: Point) -> bytes:
+        """PRF 值 k * H2(H1(u, p)) 的存储与比较格式：只取 x 坐标"""
+        return point.x.to_bytes(self._coord_size, 'big')
+
+    # ---------- 纯 Python 的 Jacobian 坐标点运算，(X, Y, Z) 表示 (X/Z^2, Y/Z^3)，Z = 0 为无穷远点 ----------
+
+    def _jac_double(self, X1: int, Y1: int, Z1: int) -> Tuple[int, int, int]:
+        """Jacobian 倍点：S = 4XY^2，M = 3X^2 + aZ^4"""
+        if not Z1 or not Y1:
+            return 1, 1, 0
+        p = self._p
+        YY = Y1 * Y1 % p
+        S = 4 * X1 * YY % p
+        ZZ = Z1 * Z1 % p
+        M = (3 * X1 * X1 + self._a * ZZ * ZZ) % p
+        X3 = (M * M - 2 * S) % p
+        Y3 = (M * (S - X3) - 8 * YY * YY) % p
+        Z3 = 2 * Y1 * Z1 % p
+        return X3, Y3, Z3
+
+    def _jac_add_affine(self, X1: int, Y1: int, Z1: int, x2: int, y2: int) -> Tuple[int, int, int]:
+        """Jacobian 点与有限仿射点 (x2, y2) 的混合加法"""
+        if not Z1:
+            return x2, y2, 1
+        p = self._p
+        ZZ = Z1 * Z1 % p
+        H = (x2 * ZZ - X1) % p
+        r = (y2 * ZZ * Z1 - Y1) % p
+        if not H:
+            if not r:
+                return self._jac_double(X1, Y1, Z1)
+            return 1, 1, 0
+        HH = H * H % p
+        HHH = H * HH % p
+        V = X1 * HH % p
+        X3 = (r * r - HHH - 2 * V) % p
+        Y3 = (r * (V - X3) - Y1 * HHH) % p
+        Z3 = Z1 * H % p
+        return X3, Y3, Z3
+
+    def _jac_add(self, X1: int, Y1: int, Z1: int, X2: int, Y2: int, Z2: int) -> Tuple[int, int, int]:
+        """两个 Jacobian 点的一般加法"""
+        if not Z1:
+            return X2, Y2, Z2
+        if not Z2:
+            return X1, Y1, Z1
+        p = self._p
+        Z1Z1 = Z1 * Z1 % p
+        Z2Z2 = Z2 * Z2 % p
+        U1 = X1 * Z2Z2 % p
+        S1 = Y1 * Z2Z2 * Z2 % p
+        H = (X2 * Z1Z1 - U1) % p
+        r = (Y2 * Z1Z1 * Z1 - S1) % p
+        if not H:
+            if not r:
+                return self._jac_double(X1, Y1, Z1)
+            return 1, 1, 0
+        HH = H * H % p
+        HHH = H * HH % p
+        V = U1 * HH % p
+        X3 = (r * r - HHH - 2 * V) % p
+        Y3 = (r * (V - X3) - S1 * HHH) % p
+        Z3 = Z1 * Z2 % p * H % p
+        return X3, Y3, Z3
+
+    def _jac_to_point(self, X: int, Y: int, Z: int) -> Point:
+        """Jacobian 坐标转换为仿射点"""
+        if not Z:
+            return Inf(self.curve)
+        p = self._p
+        zi = _mod_inverse(Z, p)
+        zi2 = zi * zi % p
+        return Point(self.curve, X * zi2 % p, Y * zi2 * zi % p)
+
+    def _batch_to_affine(self, points: List[Tuple[int, int, int]]) -> List[Tuple[int, int]]:
+        """批量转换为仿射坐标，用 Montgomery 技巧只求一次逆（各点均不能为无穷远点）"""
+        p = self._p
+        prefix = []
+        acc = 1
+        for _, _, Z in points:
+            prefix.append(acc)
+            acc = acc * Z % p
+
+        inv = _mod_inverse(acc, p)
+        affine = [None] * len(points)
+        for i in range(len(points) - 1, -1, -1):
+            X, Y, Z = points[i]
+            zi = inv * prefix[i] % p
+            inv = inv * Z % p
+            zi2 = zi * zi % p
+            affine[i] = (X * zi2 % p, Y * zi2 * zi % p)
+        return affine
+
+    def _odd_multiples(self, point: Point, count: int) -> List[Tuple[int, int]]:
+        """预计算 [P, 3P, 5P, ..., (2count-1)P] 的仿射坐标"""
+        x, y = point.x, point.y
+        (x2, y2), = self._batch_to_affine([self._jac_double(x, y, 1)])
+        multiples = [(x, y, 1)]
+        for _ in range(count - 1):
+            multiples.append(self._jac_add_affine(*multiples[-1], x2, y2))
+        return self._batch_to_affine(multiples)
+
+    def _wnaf_scalar_mult(self, point: Point, k_wnaf: List[int]) -> Point:
+        """按 wNAF 数字从高位到低位倍点，每个非零数字做一次与预计算奇数倍点的混合加法"""
+        if not k_wnaf or isinstance(point, Inf):
+            return Inf(self.curve)
+
+        p = self._p
+        table = self._odd_multiples(point, 1 << (WNAF_WIDTH - 2))
+        X, Y, Z = 1, 1, 0
+        for d in reversed(k_wnaf):
+            X, Y, Z = self._jac_double(X, Y, Z)
+            if d > 0:
+                x2, y2 = table[d >> 1]
+                X, Y, Z = self._jac_add_affine(X, Y, Z, x2, y2)
+            elif d < 0:
+                x2, y2 = table[-d >> 1]
+                X, Y, Z = self._jac_add_affine(X, Y, Z, x2, p - y2)
+        return self._jac_to_point(X, Y, Z)
+
+    def _ladder_mul(self, k: int, point: Point) -> Point:
+        """
+        Montgomery 阶梯：保持 R1 - R0 = P，每个比特都执行一次点加和一次倍点
+
+        标量先变换为 k + n 或 k + 2n，使其最高位固定为 n 的比特长度所在的位，从 R0 = P、R1 = 2P 开始，
+        循环次数只取决于 n，不会因 k 的前导零而在无穷远点上走捷径；寄存器交换用掩码运算完成。
+        Python 大整数运算本身不是常数时间的，这里只消除了由算法分支和比特模式带来的时间差异
+        """
+        n = self._n
+        k %= n
+        if k == 0 or isinstance(point, Inf):
+            return Inf(self.curve)
+
+        # k + n 不足 bits + 1 个比特时再加一个 n，选择通过算术完成
+        bits = n.bit_length()
+        k1 = k + n
+        k1 += (1 - (k1 >> bits)) * n
+
+        jac_add, jac_double = self._jac_add, self._jac_double
+        R0 = (point.x, point.y, 1)
+        R1 = jac_double(*R0)
+        for i in range(bits - 1, -1, -1):
+            bit = (k1 >> i) & 1
+            R0, R1 = _cswap(bit, R0, R1)
+            R1 = jac_add(*R0, *R1)
+            R0 = jac_double(*R0)
+            R0, R1 = _cswap(bit, R0, R1)
+        return self._jac_to_point(*R0)
+
     def point_to_bytes(self, point: Point) -> bytes:
-        """将椭圆曲线点序列化为字节串"""
-        try:
-            coord_size = (self.curve.field.n.bit_length() + 7) // 8
-            return (point.x.to_bytes(coord_size, 'big') +
-                    point.y.to_bytes(coord_size, 'big'))
-        except Exception as e:
-            raise CryptographicError(f"点序列化失败: {e}")
+        """将椭圆曲线点序列化为 SEC1 压缩格式：0x02/0x03 (y 的奇偶性) || x"""
+        return bytes([2 | (point.y & 1)]) + point.x.to_bytes(self._coord_size, 'big')
 
     def bytes_to_point(self, data: bytes) -> Point:
-        """从字节串反序列化椭圆曲线点"""
-        try:
-            coord_size = (self.curve.field.n.bit_length() + 7) // 8
-            if len(data) != 2 * coord_size:
-                raise InvalidInputError(f"数据长度错误，期望 {2 * coord_size}，实际 {len(data)}")
+        """
+        从 SEC1 压缩格式的字节串反序列化椭圆曲线点
 
-            x = int.from_bytes(data[:coord_size], 'big')
-            y = int.from_bytes(data[coord_size:], 'big')
+        总是验证 x 在域范围内且点在曲线上：压缩格式本来就要做一次开方，验证只多一次平方和比较
+
+        Args:
+            data: 序列化的点
 
-            point = Point(self.curve, x, y)
-            if not self._is_valid_point(point):
+        Returns:
+            椭圆曲线上的点
+        """
+        try:
+            coord_size = self._coord_size
+            if len(data) != 1 + coord_size:
+                raise InvalidInputError(f"数据长度错误，期望 {1 + coord_size}，实际 {len(data)}")
+            if data[0] not in (2, 3):
+                raise InvalidInputError(f"未知的点编码前缀 {data[0]:#04x}")
+
+            p = self._p
+            x = int.from_bytes(data[1:], 'big')
+            if x >= p:
+                raise CryptographicError("x 坐标超出域范围")
+
+            # 由 x 恢复 y（适用于 p ≡ 3 (mod 4)），再按前缀选择奇偶性
+            y_squared = ((x * x % p + self._a) * x + self._b) % p
+            y = _mod_pow(y_squared, self._sqrt_exp, p)
+            if (y * y) % p != y_squared:
                 raise CryptographicError("反序列化的点不在椭圆曲线上")
+            if (y & 1) != (data[0] & 1):
+                y = p - y
 
-            return point
+            return Point(self.curve, x, y)
         except Exception as e:
             raise CryptographicError(f"点反序列化失败: {e}")
 
+    def mod_inverse_n(self, x: int) -> int:
+        """计算 x 模曲线阶 n 的逆元"""
+        try:
+            return _mod_inverse(x, self._n)
+        except (ValueError, ZeroDivisionError) as e:
+            raise CryptographicError(f"{x} 模 n 不可逆: {e}")
+
     def generate_private_key(self) -> int:
         """生成安全的私钥"""
-        return secure_random_int(self.curve.field.n)
+        return secure_random_int(self._n)
+
+
+# ==================== 服务器预处理 ====================
+
+# 进程池工作进程内的状态，由 _init_prf_worker 在进程启动时设置一次，私钥不随每个任务传递
+_worker_crypto = None
+_worker_private_key = None
+_worker_key_wnaf = None
+
+
+def _evaluate_prf(crypto: CryptographicOperations, private_key: int, key_wnaf: List[int], y: bytes) -> bytes:
+    """
+    由凭据的哈希值 y = H1(u, p) 计算 PRF 值 k * H2(y)
+
+    Returns:
+        PRF 值（字节格式）
+    """
+    h2_y = crypto.h2_hash_to_curve(y)
+    v_y_point = crypto.scalar_mult(private_key, h2_y, key_wnaf)
+    return crypto.prf_to_bytes(v_y_point)
+
+
+def _init_prf_worker(config: Config, private_key: int) -> None:
+    """进程池初始化函数：每个工作进程只构造一次密码学操作对象"""
+    global _worker_crypto, _worker_private_key, _worker_key_wnaf
+    _worker_crypto = CryptographicOperations(config)
+    _worker_private_key = private_key
+    _worker_key_wnaf = to_wnaf(private_key)
+
+
+def _evaluate_prf_in_worker(y: bytes) -> bytes:
+    """进程池任务函数"""
+    return _evaluate_prf(_worker_crypto, _worker_private_key, _worker_key_wnaf, y)
 
 
 # ==================== 服务器类 ====================
@@ -229,17 +688,30 @@ class CryptographicOperations:
 class PasswordCheckupServer:
     """密码检查服务器类"""
 
-    def __init__(self, breached_credentials: Set[Tuple[str, str]], config: Optional[Config] = None):
+    logger = logging.getLogger(f"{__name__}.PasswordCheckupServer")
+
+    # 预处理结果缓存目录中的文件；数组文件每次重建都使用新的随机后缀，由状态文件记录当前使用的文件名
+    _CACHE_STATE_FILE = 'server_state.json'
+    _CACHE_VALUES_FILE = 'prf_values-{}.npy'
+    _CACHE_PREFIXES_FILE = 'prf_prefixes-{}.npy'
+    # 缓存密钥的最小长度（字节）
+    _CACHE_KEY_MIN_BYTES = 16
+
+    def __init__(self, breached_credentials: Set[Tuple[str, str]], config: Optional[Config] = None,
+                 cache_dir: Optional[str] = None, cache_key: Optional[bytes] = None):
         """
         初始化服务器
 
         Args:
             breached_credentials: 泄露的凭据集合 (用户名, 密码)
             config: 配置对象
+            cache_dir: 可选，预处理结果的缓存目录。目录中已有同一凭据集合和配置的结果时直接以内存映射方式加载，
+                       跳过全部密码学预处理；否则预处理后写入该目录
+            cache_key: 缓存密钥，未传入时读取环境变量 Config.CACHE_KEY_ENV。使用缓存时服务器私钥由该密钥和
+                       随机盐派生，磁盘上只保存盐，不保存私钥；没有缓存密钥时不读写缓存
         """
         self.config = config or Config()
         self.crypto = CryptographicOperations(self.config)
-        self.logger = logging.getLogger(f"{__name__}.{self.__class__.__name__}")
 
         # 验证输入
         if not isinstance(breached_credentials, set):
@@ -248,56 +720,253 @@ class PasswordCheckupServer:
         if not breached_credentials:
             raise InvalidInputError("泄露凭据集合不能为空")
 
-        self._initialize_server(breached_credentials)
-
-    def _initialize_server(self, breached_credentials: Set[Tuple[str, str]]) -> None:
+        if cache_key is None:
+            env_key = os.environ.get(self.config.CACHE_KEY_ENV)
+            cache_key = env_key.encode('utf-8') if env_key else None
+        if cache_key is not None and len(cache_key) < self._CACHE_KEY_MIN_BYTES:
+            raise InvalidInputError(f"缓存密钥至少需要 {self._CACHE_KEY_MIN_BYTES} 字节")
+        if cache_dir and cache_key is None:
+            self.logger.warning("[服务器] 未配置缓存密钥（参数 cache_key 或环境变量 %s），不使用缓存目录 %s",
+                                self.config.CACHE_KEY_ENV, cache_dir)
+            cache_dir = None
+        self._cache_key = cache_key
+
+        self._initialize_server(breached_credentials, cache_dir)
+
+    def _initialize_server(self, breached_credentials: Set[Tuple[str, str]],
+                           cache_dir: Optional[str] = None) -> None:
         """初始化服务器内部状态"""
         self.logger.info("=== [服务器] 初始化开始 ===")
 
         try:
-            # 生成服务器私钥
-            self._private_key = self.crypto.generate_private_key()
+            fingerprint = self._credentials_fingerprint(breached_credentials) if cache_dir else None
+            if cache_dir and self._load_prf_table(cache_dir, fingerprint):
+                self.logger.info(f"[服务器] 从缓存 {cache_dir} 加载 {len(self._prf_values)} 条预处理结果")
+                self.logger.info("=== [服务器] 初始化结束 ===")
+                return
+
+            # 生成服务器私钥；使用缓存时由缓存密钥和随机盐派生，缓存中只需保存盐
+            cache_salt = secrets.token_bytes(16) if cache_dir else None
+            if cache_salt is not None:
+                self._private_key = self._derive_cached_private_key(cache_salt)
+            else:
+                self._private_key = self.crypto.generate_private_key()
+            # 私钥的 wNAF 表示只计算一次，预处理和在线请求中的每次标量乘法都复用
+            self._key_wnaf = to_wnaf(self._private_key)
             self.logger.info("[服务器] 私钥生成完成")
 
-            # 预处理泄露凭据
-            self._breached_prf_values = {}
+            # 预处理泄露凭据：先按 H1 去重，只对不同的哈希值做密码学运算
             self.logger.info(f"[服务器] 开始预处理 {len(breached_credentials)} 条泄露凭据")
+            hashed_credentials = self._hash_credentials(breached_credentials)
+
+            # PRF 值逐条流式写入按条数预分配的定长缓冲区，不保留中间的 bytes 对象
+            coord_size = self.crypto._coord_size
+            prf_buffer = bytearray(len(hashed_credentials) * coord_size)
+            offset = 0
+            for v_y_bytes in self._evaluate_prfs(hashed_credentials):
+                prf_buffer[offset:offset + coord_size] = v_y_bytes
+                offset += coord_size
+
+            self._build_prf_table(prf_buffer)
+            if cache_dir:
+                self._save_prf_table(cache_dir, fingerprint, cache_salt)
+
+            self.logger.info(f"[服务器] 预处理完成，成功处理 {len(self._prf_values)} 条凭据")
+            self.logger.info(f"[服务器] 生成 {len(self._prefix_blob) // self.config.PREFIX_LENGTH_BYTES} 个唯一前缀")
+            self.logger.info("=== [服务器] 初始化结束 ===")
 
-            processed_count = 0
-            for username, password in breached_credentials:
-                try:
-                    # 验证凭据格式
-                    validate_input(username, password)
+        except Exception as e:
+            raise PasswordCheckupError(f"服务器初始化失败: {e}")
 
-                    # 计算 PRF 值
-                    y = self.crypto.h1(username, password)
-                    h2_y = self.crypto.h2_hash_to_curve(y)
-                    v_y_point = self._private_key * h2_y
-                    v_y_bytes = self.crypto.point_to_bytes(v_y_point)
+    def _build_prf_table(self, prf_buffer: bytearray) -> None:
+        """
+        以结构数组的形式存储 PRF 值，每条只占定长的字节，不再为每条记录分配 Python 对象
 
-                    # 存储前缀
-                    prefix = v_y_bytes[:self.config.PREFIX_LENGTH_BYTES]
-                    if prefix not in self._breached_prf_values:
-                        self._breached_prf_values[prefix] = []
-                    self._breached_prf_values[prefix].append(v_y_bytes)
+        Args:
+            prf_buffer: 所有 PRF 值首尾拼接的缓冲区，顺序任意
 
-                    processed_count += 1
+        _prf_values:   (N, coord_size) 的 uint8 数组，按字节序升序排列且无重复
+        _prf_prefixes: 与之对应的 N 个定长前缀（前缀取自 PRF 值的开头，因此同样有序），用于二分查找
+        """
+        prefix_len = self.config.PREFIX_LENGTH_BYTES
+        coord_size = self.crypto._coord_size
+
+        # 定长字节串数组按字节序比较，np.unique 一次完成排序和去重
+        rows = np.unique(np.frombuffer(prf_buffer, dtype=f'S{coord_size}'))
+        self._prf_values = rows.view(np.uint8).reshape(-1, coord_size)
+        self._prf_prefixes = np.ascontiguousarray(self._prf_values[:, :prefix_len]).view(f'S{prefix_len}').ravel()
+
+        # 所有前缀去重后拼接为一个紧凑的字节串，只构造一次，每次客户端请求直接返回
+        self._prefix_blob = np.unique(self._prf_prefixes).tobytes()
+
+    def _credentials_fingerprint(self, breached_credentials: Set[Tuple[str, str]]) -> str:
+        """凭据集合与相关配置的指纹，用于判断缓存的预处理结果是否仍然有效"""
+        config = self.config
+        hasher = hashlib.sha256(repr((config.CURVE_NAME, config.PREFIX_LENGTH_BYTES,
+                                      config.HASH_ALGORITHM, config.HASH_TO_CURVE_DST)).encode('utf-8'))
+        for credential in sorted(map(repr, breached_credentials)):
+            hasher.update(credential.encode('utf-8'))
+            hasher.update(b'\n')
+        return hasher.hexdigest()
+
+    def _derive_cached_private_key(self, salt: bytes) -> int:
+        """由缓存密钥和盐派生 [1, n-1] 内的服务器私钥，多取 128 比特再取模，偏差可以忽略"""
+        n = self.crypto._n
+        length = (n.bit_length() + 128 + 7) // 8
+        blocks = []
+        for counter in range((length + 63) // 64):
+            blocks.append(hmac.new(self._cache_key, b'PasswordCheckup-cache-private-key' + salt + bytes([counter]),
+                                   hashlib.sha512).digest())
+        return int.from_bytes(b''.join(blocks)[:length], 'big') % (n - 1) + 1
+
+    def _cache_state_tag(self, state: dict) -> str:
+        """状态文件的认证标签，覆盖指纹、盐和数组文件名；缓存密钥不同或状态被篡改时校验失败"""
+        fields = {key: state[key] for key in ('fingerprint', 'salt', 'values_file', 'prefixes_file')}
+        message = b'PasswordCheckup-cache-state' + json.dumps(fields, sort_keys=True).encode('utf-8')
+        return hmac.new(self._cache_key, message, hashlib.sha256).hexdigest()
+
+    @classmethod
+    def _read_cache_state(cls, cache_dir: str) -> Optional[dict]:
+        """读取缓存目录中的状态文件，不存在或无法解析时返回 None"""
+        try:
+            with open(os.path.join(cache_dir, cls._CACHE_STATE_FILE), encoding='utf-8') as f:
+                state = json.load(f)
+        except (OSError, ValueError):
+            return None
+        return state if isinstance(state, dict) else None
 
-                except Exception as e:
-                    self.logger.warning(f"处理凭据 ({username}, ***) 失败: {e}")
-                    continue
+    def _load_prf_table(self, cache_dir: str, fingerprint: str) -> bool:
+        """
+        从缓存目录加载私钥和预处理结果，PRF 数组以只读内存映射方式打开
 
-            self.logger.info(f"[服务器] 预处理完成，成功处理 {processed_count} 条凭据")
-            self.logger.info(f"[服务器] 生成 {len(self._breached_prf_values)} 个唯一前缀")
-            self.logger.info("=== [服务器] 初始化结束 ===")
+        先用缓存密钥校验状态文件，再由其中的盐派生私钥；只加载状态文件中记录的数组文件，并检查其形状与当前配置一致。
+        缓存不存在、不匹配、密钥不符或已损坏时返回 False
+        """
+        state = self._read_cache_state(cache_dir)
+        if state is None:
+            return False
+        if state.get('fingerprint') != fingerprint:
+            self.logger.info("[服务器] 缓存的预处理结果与当前凭据集合不匹配，重新预处理")
+            return False
 
-        except Exception as e:
-            raise PasswordCheckupError(f"服务器初始化失败: {e}")
+        try:
+            tag = state.get('tag')
+            if not isinstance(tag, str) or not hmac.compare_digest(tag, self._cache_state_tag(state)):
+                raise ValueError("状态文件校验失败（缓存密钥不同或文件被篡改）")
+            private_key = self._derive_cached_private_key(bytes.fromhex(state['salt']))
+            values = np.load(os.path.join(cache_dir, state['values_file']), mmap_mode='r')
+            prefixes = np.load(os.path.join(cache_dir, state['prefixes_file']), mmap_mode='r')
+            if (values.dtype != np.uint8 or values.ndim != 2 or values.shape[1] != self.crypto._coord_size
+                    or prefixes.dtype != np.dtype(f'S{self.config.PREFIX_LENGTH_BYTES}')
+                    or prefixes.shape != (values.shape[0],)):
+                raise ValueError("数组形状或类型与当前配置不符")
+        except (OSError, ValueError, KeyError, TypeError) as e:
+            self.logger.warning("[服务器] 缓存 %s 无法加载，重新预处理: %s", cache_dir, e)
+            return False
+
+        self._private_key = private_key
+        self._key_wnaf = to_wnaf(private_key)
+        self._prf_values = values
+        self._prf_prefixes = prefixes
+        self._prefix_blob = np.unique(prefixes).tobytes()
+        return True
+
+    @staticmethod
+    def _write_durably(path: str, array: np.ndarray) -> None:
+        """写入 .npy 文件（仅所有者可读写）并刷到磁盘，保证状态文件引用它之前内容已经完整落盘"""
+        fd = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+        with os.fdopen(fd, 'wb') as f:
+            np.save(f, array)
+            f.flush()
+            os.fsync(f.fileno())
+
+    def _save_prf_table(self, cache_dir: str, fingerprint: str, salt: bytes) -> None:
+        """
+        把派生私钥所用的盐和预处理结果写入缓存目录，私钥本身不落盘
+
+        数组写入带随机后缀的新文件，不覆盖任何已有文件（其他服务器可能正以内存映射方式使用旧文件），
+        全部落盘后再原子地替换状态文件；状态文件记录数组文件名，崩溃时旧状态仍只引用旧数组
+        """
+        os.makedirs(cache_dir, mode=0o700, exist_ok=True)
+        previous = self._read_cache_state(cache_dir)
+
+        token = secrets.token_hex(8)
+        values_file = self._CACHE_VALUES_FILE.format(token)
+        prefixes_file = self._CACHE_PREFIXES_FILE.format(token)
+        self._write_durably(os.path.join(cache_dir, values_file), self._prf_values)
+        self._write_durably(os.path.join(cache_dir, prefixes_file), self._prf_prefixes)
+
+        state = {'fingerprint': fingerprint, 'salt': salt.hex(),
+                 'values_file': values_file, 'prefixes_file': prefixes_file}
+        state['tag'] = self._cache_state_tag(state)
+
+        state_path = os.path.join(cache_dir, self._CACHE_STATE_FILE)
+        tmp_path = state_path + '.tmp'
+        fd = os.open(tmp_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            json.dump(state, f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, state_path)
+        self.logger.info(f"[服务器] 预处理结果已写入缓存 {cache_dir}")
+
+        # 删除上一次的数组文件；已映射这些文件的进程不受影响，删除失败（如 Windows 上文件仍被占用）时保留
+        if previous:
+            for key in ('values_file', 'prefixes_file'):
+                name = previous.get(key)
+                if isinstance(name, str) and name == os.path.basename(name):
+                    try:
+                        os.remove(os.path.join(cache_dir, name))
+                    except OSError:
+                        pass
+
+    def _hash_credentials(self, breached_credentials: Set[Tuple[str, str]]) -> List[bytes]:
+        """
+        验证凭据格式并计算 H1，丢弃格式无效的凭据和 H1 相同的重复凭据
+
+        Returns:
+            互不相同的 H1 哈希值列表
+        """
+        h1 = self.crypto.h1
+        hashed = set()
+        for username, password in breached_credentials:
+            try:
+                hashed.add(h1(username, password))
+            except InvalidInputError as e:
+                self.logger.warning("处理凭据 (%s, ***) 失败: %s", username, e)
+
+        self.logger.debug("[服务器] 去重后剩余 %d 条凭据", len(hashed))
+        return list(hashed)
+
+    def _evaluate_prfs(self, hashed_credentials: List[bytes]) -> Iterator[bytes]:
+        """
+        逐条生成所有凭据哈希值对应的 PRF 值
 
-    def get_breached_prf_prefixes(self) -> List[bytes]:
-        """获取所有泄露凭据的PRF值前缀列表"""
-        self.logger.debug("[服务器] 收到客户端请求，返回PRF前缀列表")
-        return list(self._breached_prf_values.keys())
+        各凭据相互独立，数量较多时分发到进程池并行计算；数量较少时进程启动开销得不偿失，直接在当前进程中计算
+        """
+        if len(hashed_credentials) < self.config.PARALLEL_MIN_CREDENTIALS:
+            crypto, private_key, key_wnaf = self.crypto, self._private_key, self._key_wnaf
+            for y in hashed_credentials:
+                yield _evaluate_prf(crypto, private_key, key_wnaf, y)
+            return
+
+        max_workers = self.config.MAX_WORKERS or os.cpu_count() or 1
+        self.logger.info(f"[服务器] 使用 {max_workers} 个进程并行预处理")
+        with ProcessPoolExecutor(max_workers=max_workers,
+                                 initializer=_init_prf_worker,
+                                 initargs=(self.config, self._private_key)) as executor:
+            yield from executor.map(_evaluate_prf_in_worker, hashed_credentials,
+                                    chunksize=self.config.PARALLEL_CHUNKSIZE)
+
+    def get_breached_prf_prefixes(self) -> bytes:
+        """
+        获取所有泄露凭据的PRF值前缀
+
+        Returns:
+            按字节序升序排列的定长前缀首尾拼接而成的字节串，可用 sorted_blob_contains 查找
+        """
+        self.logger.debug("[服务器] 收到客户端请求，返回PRF前缀")
+        return self._prefix_blob
 
     def handle_blinded_request(self, blinded_point_bytes: bytes) -> bytes:
         """
@@ -312,11 +981,11 @@ class PasswordCheckupServer:
         try:
             self.logger.debug("[服务器] 收到盲化请求")
 
-            # 反序列化盲化点
+            # 反序列化盲化点（来自客户端的不可信输入，必须验证）
             blinded_point = self.crypto.bytes_to_point(blinded_point_bytes)
 
             # 计算 Z = k * T
-            result_point = self._private_key * blinded_point
+            result_point = self.crypto.scalar_mult(self._private_key, blinded_point, constant_time=True)
 
             # 序列化结果
             result_bytes = self.crypto.point_to_bytes(result_point)
@@ -327,13 +996,19 @@ class PasswordCheckupServer:
         except Exception as e:
             raise CryptographicError(f"处理盲化请求失败: {e}")
 
-    def get_full_hashes_for_prefix(self, prefix: bytes) -> List[bytes]:
-        """根据前缀获取完整哈希列表"""
+    def get_full_hashes_for_prefix(self, prefix: bytes) -> Set[bytes]:
+        """根据前缀获取完整哈希集合"""
         if not isinstance(prefix, bytes):
             raise InvalidInputError("前缀必须是字节类型")
 
-        self.logger.debug(f"[服务器] 查询前缀 {prefix.hex()} 的完整哈希")
-        return self._breached_prf_values.get(prefix, [])
+        if self.logger.isEnabledFor(logging.DEBUG):
+            self.logger.debug("[服务器] 查询前缀 %s 的完整哈希", prefix.hex())
+        if len(prefix) != self.config.PREFIX_LENGTH_BYTES:
+            return set()
+
+        start = np.searchsorted(self._prf_prefixes, prefix, side='left')
+        end = np.searchsorted(self._prf_prefixes, prefix, side='right')
+        return {row.tobytes() for row in self._prf_values[start:end]}
 
 
 # ==================== 客户端类 ====================
@@ -341,6 +1016,8 @@ class PasswordCheckupServer:
 class PasswordCheckupClient:
     """密码检查客户端类"""
 
+    logger = logging.getLogger(f"{__name__}.PasswordCheckupClient")
+
     def __init__(self, username: str, password: str, config: Optional[Config] = None):
         """
         初始化客户端
@@ -352,14 +1029,13 @@ class PasswordCheckupClient:
         """
         self.config = config or Config()
         self.crypto = CryptographicOperations(self.config)
-        self.logger = logging.getLogger(f"{__name__}.{self.__class__.__name__}")
 
         # 验证并存储凭据
         validate_input(username, password)
         self.username = username
         self.password = password
 
-        self.logger.info(f"=== [客户端] 初始化完成，用户: '{self.username}' ===")
+        self.logger.info("=== [客户端] 初始化完成，用户: '%s' ===", self.username)
 
     def check_password_leak(self, server: PasswordCheckupServer) -> bool:
         """
@@ -372,7 +1048,7 @@ class PasswordCheckupClient:
             True 如果密码已泄露，False 否则
         """
         try:
-            self.logger.info(f"[客户端] 开始检查用户 '{self.username}' 的密码")
+            self.logger.info("[客户端] 开始检查用户 '%s' 的密码", self.username)
 
             # 第一步：客户端盲化
             blinding_result = self._perform_blinding()
@@ -384,12 +1060,12 @@ class PasswordCheckupClient:
             is_leaked = self._unblind_and_verify(server, blinding_result, server_result)
 
             result_str = "已泄露" if is_leaked else "安全"
-            self.logger.info(f"=== [结论] 用户 '{self.username}' 的凭据{result_str} ===")
+            self.logger.info("=== [结论] 用户 '%s' 的凭据%s ===", self.username, result_str)
 
             return is_leaked
 
         except Exception as e:
-            self.logger.error(f"密码检查过程出错: {e}")
+            self.logger.error("密码检查过程出错: %s", e)
             raise PasswordCheckupError(f"密码检查失败: {e}")
 
     def _perform_blinding(self) -> dict:
@@ -399,7 +1075,8 @@ class PasswordCheckupClient:
 
             # 计算凭据哈希
             x = self.crypto.h1(self.username, self.password)
-            self.logger.debug(f"[客户端] 计算H1(u,p) = {x.hex()}")
+            if self.logger.isEnabledFor(logging.DEBUG):
+                self.logger.debug("[客户端] 计算H1(u,p) = %s", x.hex())
 
             # 映射到曲线点
             P = self.crypto.h2_hash_to_curve(x)
@@ -410,7 +1087,7 @@ class PasswordCheckupClient:
             self.logger.debug("[客户端] 生成盲化因子")
 
             # 计算盲化点
-            T = t * P
+            T = self.crypto.scalar_mult(t, P, constant_time=True)
             T_bytes = self.crypto.point_to_bytes(T)
             self.logger.debug("[客户端] 计算盲化点完成")
 
@@ -445,24 +1122,28 @@ class PasswordCheckupClient:
 
             # 计算盲化因子的逆元
             t = blinding_result['blinding_factor']
-            t_inv = pow(t, -1, self.crypto.curve.field.n)
+            t_inv = self.crypto.mod_inverse_n(t)
             self.logger.debug("[客户端] 计算盲化因子逆元")
 
-            # 去盲化
+            # 去盲化（服务器返回的点同样是不可信输入，反序列化时会验证其在曲线上）
             Z_point = self.crypto.bytes_to_point(server_result)
-            V_point = t_inv * Z_point
-            V_bytes = self.crypto.point_to_bytes(V_point)
-            self.logger.debug(f"[客户端] 去盲化得到PRF值: {V_bytes.hex()}")
+            V_point = self.crypto.scalar_mult(t_inv, Z_point, constant_time=True)
+            V_bytes = self.crypto.prf_to_bytes(V_point)
+            debug = self.logger.isEnabledFor(logging.DEBUG)
+            if debug:
+                self.logger.debug("[客户端] 去盲化得到PRF值: %s", V_bytes.hex())
 
             # 获取泄露数据前缀
             leaked_prefixes = server.get_breached_prf_prefixes()
-            self.logger.debug(f"[客户端] 获取到 {len(leaked_prefixes)} 个泄露前缀")
+            if debug:
+                self.logger.debug("[客户端] 获取到 %d 个泄露前缀", len(leaked_prefixes) // self.config.PREFIX_LENGTH_BYTES)
 
             # 检查前缀匹配
             my_prefix = V_bytes[:self.config.PREFIX_LENGTH_BYTES]
-            self.logger.debug(f"[客户端] 本地PRF前缀: {my_prefix.hex()}")
+            if debug:
+                self.logger.debug("[客户端] 本地PRF前缀: %s", my_prefix.hex())
 
-            if my_prefix not in leaked_prefixes:
+            if not sorted_blob_contains(leaked_prefixes, my_prefix):
                 self.logger.debug("[客户端] 前缀不匹配，密码安全")
                 return False
 